@@ -0,0 +1,254 @@
+"""
+Per-request instrumentation: SQL query count and time, serializer time and total time,
+reported in a ``Server-Timing`` header, logged when over the thresholds below and
+aggregated into per-route histograms served in Prometheus text format at ``/metrics``.
+
+Settings (all optional):
+
+- ``REQUEST_METRICS_SAMPLE_RATE``: fraction of requests whose SQL and serializer time
+  is measured (default 1.0). Unsampled requests only pay for a clock read.
+- ``REQUEST_METRICS_SLOW_MS`` / ``REQUEST_METRICS_MAX_QUERIES``: log sampled requests
+  slower or chattier than this (defaults 500 ms and 50 queries).
+- ``REQUEST_METRICS_REPEATED_QUERIES``: log a statement that runs at least this many
+  times in one request as a likely N+1 (default 10).
+- ``METRICS_TOKEN``: when set, ``/metrics`` requires ``Authorization: Bearer <token>``;
+  otherwise it is only served to staff users logged in with a session.
+
+Histograms are kept per process; scrape every worker.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 1.0
+SLOW_MS = 500
+MAX_QUERIES = 50
+REPEATED_QUERIES = 10
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """The statement with literals and IN lists collapsed, so repeats of one query compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold):
+        fingerprints = Counter()
+        for sql, count in self.statements.items():
+            fingerprints[fingerprint(sql)] += count
+        return [(sql, count) for sql, count in fingerprints.most_common() if count >= threshold]
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = {labels: ([*counts], total, count) for labels, (counts, total, count) in self.series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            label_text = ','.join(f'{key}="{value}"' for key, value in labels)
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return '\n'.join(lines)
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route.', DURATION_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL queries per sampled request, by route.', QUERY_BUCKETS
+)
+REQUEST_SQL_TIME = Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per sampled request, by route.', DURATION_BUCKETS
+)
+REQUEST_SERIALIZER_TIME = Histogram(
+    'http_request_serializer_seconds', 'Time spent serializing per sampled request, by route.', DURATION_BUCKETS
+)
+HISTOGRAMS = [REQUEST_DURATION, REQUEST_QUERIES, REQUEST_SQL_TIME, REQUEST_SERIALIZER_TIME]
+
+
+_serializer_timing_installed = False
+
+
+def install_serializer_timing():
+    """Time ``serializer.data`` for sampled requests; outermost call only, so nesting isn't counted twice."""
+    global _serializer_timing_installed
+    if _serializer_timing_installed:
+        return
+    _serializer_timing_installed = True
+    data = serializers.BaseSerializer.data
+
+    def timed_data(self):
+        metrics = _current.get()
+        if metrics is None:
+            return data.fget(self)
+        metrics.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - started
+
+    serializers.BaseSerializer.data = property(timed_data)
+
+
+def route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else 'unmatched'
+
+
+class RequestMetricsMiddleware:
+    """
+    Collects the per-request numbers described in this module. Sync and async capable;
+    under async views only the total time is measured, as their queries run on other threads.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_serializer_timing()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if random.random() >= _setting('REQUEST_METRICS_SAMPLE_RATE', SAMPLE_RATE):
+            started = time.perf_counter()
+            response = self.get_response(request)
+            self.finish(request, response, time.perf_counter() - started)
+            return response
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, time.perf_counter() - started, metrics)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.finish(request, response, time.perf_counter() - started)
+        return response
+
+    def finish(self, request, response, elapsed, metrics=None):
+        labels = (('route', route(request)), ('method', request.method))
+        REQUEST_DURATION.observe(labels, elapsed)
+        timings = [f'total;dur={elapsed * 1000:.1f}']
+
+        if metrics is not None:
+            REQUEST_QUERIES.observe(labels, metrics.queries)
+            REQUEST_SQL_TIME.observe(labels, metrics.sql_time)
+            REQUEST_SERIALIZER_TIME.observe(labels, metrics.serializer_time)
+            timings = [
+                f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f'serialize;dur={metrics.serializer_time * 1000:.1f}',
+            ] + timings
+            self.log_if_slow(request, elapsed, metrics)
+
+        response['Server-Timing'] = ', '.join(timings)
+
+    def log_if_slow(self, request, elapsed, metrics):
+        repeated = metrics.repeated(_setting('REQUEST_METRICS_REPEATED_QUERIES', REPEATED_QUERIES))
+        if (
+            elapsed * 1000 < _setting('REQUEST_METRICS_SLOW_MS', SLOW_MS)
+            and metrics.queries <= _setting('REQUEST_METRICS_MAX_QUERIES', MAX_QUERIES)
+            and not repeated
+        ):
+            return
+        logger.warning(
+            '%s %s took %.0fms with %d queries (%.0fms SQL, %.0fms serializing)%s',
+            request.method, request.get_full_path(), elapsed * 1000, metrics.queries,
+            metrics.sql_time * 1000, metrics.serializer_time * 1000,
+            ''.join(f'\n  repeated {count}x: {sql}' for sql, count in repeated),
+        )
+
+
+def metrics_view(request):
+    token = _setting('METRICS_TOKEN', None)
+    if token:
+        allowed = request.headers.get('Authorization') == f'Bearer {token}'
+    else:
+        allowed = request.user.is_staff
+    if not allowed:
+        return HttpResponseForbidden()
+    body = '\n'.join(histogram.render() for histogram in HISTOGRAMS) + '\n'
+    return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'api.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,8 +52,15 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'authentication.activity.ActivityLogMiddleware',
 ]
 
+# Activity log rows are buffered and written in batches by a background thread
+# (authentication.activity). The test runner turns it off; tests enable it explicitly.
+ACTIVITY_LOG_ENABLED = os.getenv('ACTIVITY_LOG_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+TEST_RUNNER = 'api.test_runner.TestRunner'
+
 ROOT_URLCONF = 'api.urls'
 STATIC_URL='/static/'
 TEMPLATES = [
@@ -80,7 +88,10 @@ DATABASES = {
     'USER': os.getenv('PGUSER'),
     'PASSWORD': os.getenv('PGPASSWORD'),
     'HOST': os.getenv('PGHOST'),
-    'PORT':6543
+    'PORT':6543,
+    # The pooler on 6543 runs in transaction mode, which can't hold the named cursors
+    # that QuerySet.iterator() would otherwise open.
+    'DISABLE_SERVER_SIDE_CURSORS': True,
   }
 }
 
@@ -127,6 +138,7 @@ REST_AUTH = {
     'REGISTER_SERIALIZER': 'authentication.serializers.CustomRegisterSerializer',
     'USER_DETAILS_SERIALIZER': 'authentication.serializers.UserAccountSerialzer',
     'USE_JWT': True,
+    'JWT_TOKEN_CLAIMS_SERIALIZER': 'authentication.tokens.ClaimsTokenObtainPairSerializer',
     'JWT_AUTH_COOKIE': 'jwt-auth',
     'JWT_AUTH_REFRESH_COOKIE': 'jwt-refresh-token',
     'JWT_AUTH_RETURN_EXPIRATION': True,
@@ -138,15 +150,19 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
     'COERCE_DECIMAL_TO_STRING': False,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.tokens.ClaimsJWTAuthentication',
     ),
 }
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': datetime.timedelta(days=15),
+    # Role and staff claims in access tokens are only re-read from the account on refresh,
+    # so this bounds how long a demoted or deactivated user keeps them.
+    'ACCESS_TOKEN_LIFETIME': datetime.timedelta(minutes=int(os.getenv('ACCESS_TOKEN_LIFETIME_MINUTES', '15'))),
     'REFRESH_TOKEN_LIFETIME': datetime.timedelta(days=20),
     'ROTATE_REFRESH_TOKENS': True,
     'UPDATE_LAST_LOGIN': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'authentication.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.tokens.ClaimsTokenRefreshSerializer',
 }
 
 JWT_AUTH_SECURE = False
@@ -0,0 +1,15 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the suite with the activity log off; tests that cover it enable it themselves."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.activity_log = override_settings(ACTIVITY_LOG_ENABLED=False)
+        self.activity_log.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.activity_log.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,12 +1,16 @@
 from django.contrib import admin
-from django.urls import path, include
-from dj_rest_auth.jwt_auth import get_refresh_view
+from django.urls import path, include, re_path
 from rest_framework_simplejwt.views import TokenVerifyView
+from api.metrics import metrics_view
+from authentication.views import ClaimsTokenRefreshView
 from authentication.urls import urlpatterns as authentication_urls
 from properties.urls import urlpatterns as property_urls
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    # Ahead of dj_rest_auth.urls, which routes the same path to its own refresh view.
+    re_path(r'^accounts/token/refresh/?$', ClaimsTokenRefreshView.as_view(), name='token_refresh'),
     path('accounts/',  include('dj_rest_auth.urls')),
     path('accounts/',  include(authentication_urls)),
     path('accounts/registration/', include('dj_rest_auth.registration.urls')),
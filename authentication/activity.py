@@ -0,0 +1,192 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from authentication.models import (
+    CREATE, DELETE, FAILED, READ, SUCCESS, UPDATE, ActivtyLog,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 2.0
+
+METHOD_ACTIONS = {
+    'GET': READ,
+    'POST': CREATE,
+    'PUT': UPDATE,
+    'PATCH': UPDATE,
+    'DELETE': DELETE,
+}
+# Logins and logouts through these views are recorded by the auth signal receivers.
+SIGNAL_LOGGED_URLS = {'rest_login', 'rest_logout'}
+EXCLUDED_PATHS = ('/admin/', '/static/', '/metrics')
+
+
+def _setting(name, default):
+    return getattr(settings, f'ACTIVITY_LOG_{name}', default)
+
+
+class ActivityRecorder:
+    """
+    Buffers ``ActivtyLog`` rows in a bounded queue and writes them with ``bulk_create``
+    once ``BATCH_SIZE`` rows are waiting or ``FLUSH_INTERVAL`` seconds have passed.
+
+    With ``ACTIVITY_LOG_ASYNC`` (the default) a daemon thread does the writes, so
+    requests never wait on them; otherwise the recording thread flushes full batches
+    itself and callers flush the rest. When the queue is full new events are dropped
+    and counted rather than slowing requests down. Pending rows are flushed at exit.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=_setting('QUEUE_SIZE', QUEUE_SIZE))
+        self.dropped = 0
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def record(self, entry):
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            return
+
+        if _setting('ASYNC', True):
+            self._ensure_thread()
+        elif self.queue.qsize() >= _setting('BATCH_SIZE', BATCH_SIZE):
+            self.flush()
+
+    def _drain(self, limit):
+        entries = []
+        while len(entries) < limit:
+            try:
+                entries.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return entries
+
+    def flush(self):
+        """Write everything queued so far and return the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                entries = self._drain(_setting('BATCH_SIZE', BATCH_SIZE))
+                if not entries:
+                    return written
+                try:
+                    ActivtyLog.objects.bulk_create(entries)
+                    written += len(entries)
+                except DatabaseError:
+                    logger.exception('Dropped %d activity log entries', len(entries))
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='activity-log-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = _setting('FLUSH_INTERVAL', FLUSH_INTERVAL)
+        batch_size = _setting('BATCH_SIZE', BATCH_SIZE)
+        last_flush = time.monotonic()
+        while True:
+            time.sleep(min(interval, 0.1))
+            if self.queue.qsize() >= batch_size or time.monotonic() - last_flush >= interval:
+                close_old_connections()
+                self.flush()
+                last_flush = time.monotonic()
+
+
+recorder = ActivityRecorder()
+atexit.register(recorder.flush)
+
+
+def record(action_type, actor=None, obj=None, model=None, object_id=None, status=SUCCESS, remarks=None, data=None):
+    """Queue an activity log entry; it is written later by the recorder."""
+    if not _setting('ENABLED', True):
+        return
+    if obj is not None:
+        model, object_id = type(obj), obj.pk
+    content_type = ContentType.objects.get_for_model(model) if model is not None else None
+    recorder.record(ActivtyLog(
+        # By id, so a token-backed user is not loaded just to be logged.
+        actor_id=actor.pk if actor is not None and actor.is_authenticated else None,
+        action_type=action_type,
+        action_time=timezone.now(),
+        status=status,
+        remarks=remarks,
+        data=data or {},
+        content_type=content_type,
+        object_id=str(object_id) if object_id is not None else None,
+    ))
+
+
+def _view_model(resolver_match):
+    view_class = getattr(resolver_match.func, 'cls', None)
+    queryset = getattr(view_class, 'queryset', None)
+    return queryset.model if queryset is not None else None
+
+
+def record_request(request, response):
+    action_type = METHOD_ACTIONS.get(request.method)
+    match = request.resolver_match
+    if (
+        action_type is None
+        or match is None
+        or match.url_name in SIGNAL_LOGGED_URLS
+        or request.path.startswith(_setting('EXCLUDED_PATHS', EXCLUDED_PATHS))
+    ):
+        return
+
+    # DRF copies the user it authenticated (e.g. from the JWT) back onto the Django request.
+    record(
+        action_type,
+        actor=getattr(request, 'user', None),
+        model=_view_model(match),
+        object_id=match.kwargs.get('pk'),
+        status=FAILED if response.status_code >= 400 else SUCCESS,
+        data={
+            'path': request.path,
+            'method': request.method,
+            'view': match.view_name,
+            'status_code': response.status_code,
+        },
+    )
+
+
+class ActivityLogMiddleware:
+    """
+    Records one activity log entry per request, typed by its HTTP method. Works in both
+    sync and async stacks so async views such as the auction event stream stay async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        record_request(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        await sync_to_async(record_request)(request, response)
+        return response
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.models import ActivtyLog
+
+
+class Command(BaseCommand):
+    help = 'Delete activity log rows older than the retention period, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        expired = ActivtyLog.objects.filter(action_time__lt=cutoff).order_by()
+        deleted = 0
+        while True:
+            # Small batches keep each DELETE short, so the log stays writable while it runs.
+            ids = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += ActivtyLog.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} activity log entries older than {cutoff:%Y-%m-%d}'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activtylog',
+            name='action_time',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='activtylog',
+            name='object_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='activtylog',
+            index=models.Index(fields=['actor', 'action_time'], name='activitylog_actor_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activtylog',
+            index=models.Index(fields=['action_time'], name='activitylog_time_idx'),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.contrib.auth.models import  PermissionsMixin, BaseUserManager, Abstr
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.dispatch import receiver
+from django.utils import timezone
 from django.db import models
 
 ROLE_ENUM = (
@@ -85,7 +86,7 @@ class UserAccount(AbstractUser):
 class ActivtyLog(models.Model):
     actor = models.ForeignKey(UserAccount, on_delete=models.CASCADE, null=True)
     action_type = models.CharField(choices=ACTION_TYPES, max_length=15)
-    action_time = models.DateTimeField(auto_now_add=True)
+    action_time = models.DateTimeField(default=timezone.now)
     remarks = models.TextField(blank=True, null=True)
     status = models.CharField(choices=ACTION_STATUS, max_length=7, default=SUCCESS)
     data = models.JSONField(default=dict)
@@ -94,8 +95,15 @@ class ActivtyLog(models.Model):
     content_type = models.ForeignKey(
         ContentType, models.SET_NULL, blank=True, null=True
     )
-    object_id = models.PositiveIntegerField(blank=True, null=True)
+    # Text so it can hold the UUID primary keys used by the property models.
+    object_id = models.CharField(max_length=64, blank=True, null=True)
     content_object = GenericForeignKey()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['actor', 'action_time'], name='activitylog_actor_time_idx'),
+            models.Index(fields=['action_time'], name='activitylog_time_idx'),
+        ]
+
     def __str__(self) -> str:
         return f"{self.action_type} by {self.actor} on {self.action_time}"
\ No newline at end of file
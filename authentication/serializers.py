@@ -6,7 +6,7 @@ from allauth.account.utils import setup_user_email
 
 from dj_rest_auth.registration.serializers import RegisterSerializer
 
-from authentication.models import UserAccount
+from authentication.models import ActivtyLog, UserAccount
 
 class CustomRegisterSerializer(RegisterSerializer):
     phone = serializers.CharField(max_length=10, required=True)  # Make it required
@@ -42,4 +42,10 @@ class CustomRegisterSerializer(RegisterSerializer):
 class UserAccountSerialzer(serializers.ModelSerializer):
     class Meta:
         model = UserAccount
-        fields=['first_name', 'last_name', 'email', 'phone']
\ No newline at end of file
+        fields=['first_name', 'last_name', 'email', 'phone']
+
+
+class ActivityLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ActivtyLog
+        fields = ['id', 'actor', 'action_type', 'action_time', 'status', 'remarks', 'data', 'content_type', 'object_id']
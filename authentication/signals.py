@@ -1,8 +1,11 @@
 
+from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 
-from authentication.models import UserAccount
+from authentication import activity
+from authentication.models import FAILED, LOGIN, LOGIN_FAILED, LOGOUT, UserAccount
+from authentication.user_cache import users
 from properties.models import Wishlist
 
 
@@ -10,4 +13,26 @@ from properties.models import Wishlist
 def create_user_wishlist(sender, instance, created, **kwargs):
     print("Called")
     if created:
-        Wishlist.objects.create(user=instance)
\ No newline at end of file
+        Wishlist.objects.create(user=instance)
+
+
+@receiver(post_save, sender=UserAccount)
+@receiver(post_delete, sender=UserAccount)
+def invalidate_cached_user(sender, instance, **kwargs):
+    users.invalidate(instance.pk)
+
+
+@receiver(user_logged_in)
+def record_login(sender, request, user, **kwargs):
+    activity.record(LOGIN, actor=user)
+
+
+@receiver(user_logged_out)
+def record_logout(sender, request, user, **kwargs):
+    activity.record(LOGOUT, actor=user)
+
+
+@receiver(user_login_failed)
+def record_login_failed(sender, credentials, request=None, **kwargs):
+    username = credentials.get('username') or credentials.get('email')
+    activity.record(LOGIN_FAILED, status=FAILED, data={'username': username} if username else {})
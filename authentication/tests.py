@@ -1,3 +1,143 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from dj_rest_auth.utils import jwt_encode
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from authentication import activity
+from authentication.models import ActivtyLog, UserAccount
+from authentication.user_cache import users
+from properties.models import Location
+
+
+@override_settings(ACTIVITY_LOG_ENABLED=True, ACTIVITY_LOG_ASYNC=False, ACTIVITY_LOG_BATCH_SIZE=3)
+class ActivityLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UserAccount.objects.create_superuser('Ad', 'Min', 'admin', password='pass')
+        cls.location = Location.objects.create(name='Bole', latitude=9.0, longitude=38.7)
+
+    def setUp(self):
+        activity.recorder.flush()
+        ActivtyLog.objects.all().delete()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_requests_are_written_in_batches(self):
+        self.client.get(f'/locations/{self.location.id}/')
+        self.client.get('/locations/')
+        self.assertEqual(ActivtyLog.objects.count(), 0)
+
+        self.client.delete(f'/locations/{self.location.id}/')
+        entries = list(ActivtyLog.objects.order_by('action_time'))
+        self.assertEqual([entry.action_type for entry in entries], ['View', 'View', 'Delete'])
+        self.assertEqual(entries[0].actor, self.admin)
+        self.assertEqual((entries[0].content_type.model, entries[0].object_id), ('location', str(self.location.id)))
+        self.assertEqual(entries[0].data['status_code'], 200)
+
+    def test_login_signals(self):
+        APIClient().post('/accounts/login/', {'email': 'admin@example.com', 'password': 'wrong'}, format='json')
+        activity.recorder.flush()
+        entry = ActivtyLog.objects.get()
+        self.assertEqual((entry.action_type, entry.status, entry.data), ('Login Failed', 'Failed', {'username': 'admin@example.com'}))
+
+    def test_query_api_and_retention(self):
+        now = timezone.now()
+        ActivtyLog.objects.bulk_create([
+            ActivtyLog(actor=self.admin, action_type='View', action_time=now - timedelta(days=days))
+            for days in (1, 100, 200)
+        ])
+
+        response = self.client.get(
+            '/accounts/activity/', {'actor': self.admin.id, 'since': (now - timedelta(days=150)).isoformat()}
+        )
+        self.assertEqual(response.data['count'], 2)
+
+        call_command('prune_activity_log', days=90, batch_size=1, stdout=open('/dev/null', 'w'))
+        self.assertEqual(ActivtyLog.objects.count(), 1)
+
+        self.assertEqual(self.client.get('/accounts/activity/', {'actor': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/accounts/activity/', {'since': '2024-13-40T00:00'}).status_code, 400)
+
+
+class TokenClaimsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        cls.customer = UserAccount.objects.create_user('Customer', 'One', '0911000001', 'customer', password='pass')
+
+    def setUp(self):
+        users.clear()
+
+    def client_for(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def user_queries(self, queries):
+        return [query for query in queries if 'FROM "authentication_useraccount"' in query['sql']]
+
+    def test_tokens_carry_role_and_staff_claims(self):
+        access, refresh = jwt_encode(self.agent)
+        self.assertEqual((access['role'], access['is_staff']), ('agent', False))
+        self.assertEqual(RefreshToken(str(refresh)).access_token['role'], 'agent')
+
+    def test_permission_checks_use_the_claims(self):
+        agent = self.client_for(jwt_encode(self.agent)[0])
+        customer = self.client_for(jwt_encode(self.customer)[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(agent.post('/properties/bulk_discount/', {}, format='json').status_code, 400)
+            self.assertEqual(customer.post('/properties/bulk_discount/', {}, format='json').status_code, 403)
+        self.assertEqual(len(queries), 0)
+
+    def test_full_user_is_loaded_lazily_and_cached_until_saved(self):
+        client = self.client_for(jwt_encode(self.customer)[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(client.get('/tour/').status_code, 200)
+        self.assertEqual(self.user_queries(queries), [])
+
+        for expected in (1, 0):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(client.post('/wishlist/').status_code, 200)
+            self.assertEqual(len(self.user_queries(queries)), expected)
+
+        self.customer.phone = '0911999999'
+        self.customer.save()
+        with CaptureQueriesContext(connection) as queries:
+            client.post('/wishlist/')
+        self.assertEqual(len(self.user_queries(queries)), 1)
+
+    def refresh(self, refresh_token):
+        return APIClient().post('/accounts/token/refresh/', {'refresh': str(refresh_token)}, format='json')
+
+    def test_refresh_reads_the_claims_from_the_account(self):
+        _, refresh = jwt_encode(self.agent)
+        self.agent.role = 'customer'
+        self.agent.save()
+
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'customer')
+        client = self.client_for(response.data['access'])
+        self.assertEqual(client.post('/properties/bulk_discount/', {}, format='json').status_code, 403)
+
+    def test_refresh_is_refused_for_inactive_and_deleted_accounts(self):
+        _, refresh = jwt_encode(self.customer)
+        self.customer.is_active = False
+        self.customer.save()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+        self.customer.delete()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_tokens_without_claims_load_the_user(self):
+        client = self.client_for(RefreshToken.for_user(self.customer).access_token)
+        self.assertEqual(client.post('/properties/bulk_discount/', {}, format='json').status_code, 403)
+        self.customer.delete()
+        users.clear()
+        self.assertEqual(client.get('/tour/').status_code, 401)
@@ -0,0 +1,111 @@
+"""
+JWT authentication without a user query per request.
+
+Tokens carry the ``role`` and ``is_staff`` of their user as signed claims, so permission
+checks read them from the token. Anything else about the user is loaded on first use,
+through the in-process ``user_cache``. Claims are read from the account whenever a token
+is issued or refreshed, so a demoted or deactivated user keeps them for at most the
+``ACCESS_TOKEN_LIFETIME``.
+"""
+from dj_rest_auth.jwt_auth import CookieTokenRefreshSerializer
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from authentication.models import UserAccount
+from authentication.user_cache import users
+
+CLAIMS = ('role', 'is_staff')
+
+
+def set_claims(token, user):
+    for claim in CLAIMS:
+        token[claim] = getattr(user, claim)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issues token pairs with the ``CLAIMS`` of the user."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        set_claims(token, user)
+        return token
+
+
+class ClaimsTokenRefreshSerializer(CookieTokenRefreshSerializer):
+    """
+    Refreshes with the ``CLAIMS`` as they are on the account now rather than as the refresh
+    token recorded them, and refuses accounts that are deleted or inactive.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(self.extract_refresh_token())
+        user = UserAccount.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        set_claims(refresh, user)
+        # TokenRefreshSerializer copies the claims into the new access (and rotated refresh) token.
+        attrs['refresh'] = str(refresh)
+        return TokenRefreshSerializer.validate(self, attrs)
+
+
+def load_user(user_id):
+    try:
+        user = users.get(user_id)
+    except UserAccount.DoesNotExist:
+        raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    return user
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    The ``UserAccount`` behind an access token. ``pk``, ``role`` and ``is_staff`` are
+    answered from the token; any other attribute loads the account, after which the
+    object behaves as one, including as a foreign key value.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        user_id = UserAccount._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        super().__init__(lambda: load_user(user_id))
+        # LazyObject forwards attribute assignment to the wrapped user.
+        self.__dict__['token'] = token
+        self.__dict__['user_id'] = user_id
+
+    def __bool__(self):
+        return True
+
+    @property
+    def pk(self):
+        return self.user_id
+
+    id = pk
+
+    @property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_staff(self):
+        return self.token['is_staff']
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that returns a ``TokenUser`` for tokens carrying the ``CLAIMS``."""
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        # Tokens issued before the claims were added still need the account.
+        if any(claim not in validated_token for claim in CLAIMS):
+            return load_user(UserAccount._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM]))
+        return TokenUser(validated_token)
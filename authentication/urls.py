@@ -2,9 +2,14 @@ from django.urls import include, path, re_path
 from rest_framework import routers
 
 from authentication.views import (
+    ActivityLogViewSet,
     GoogleLogin
 )
 
+router = routers.DefaultRouter()
+router.register(r'activity', ActivityLogViewSet)
+
 urlpatterns = [
     path('google/', GoogleLogin.as_view(), name='google_login'),
+    path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,55 @@
+import copy
+import threading
+import time
+
+from django.conf import settings
+
+from authentication.models import UserAccount
+
+TTL = 60
+MAX_SIZE = 10000
+
+
+def _setting(name, default):
+    return getattr(settings, f'USER_CACHE_{name}', default)
+
+
+class UserCache:
+    """
+    An in-process cache of ``UserAccount`` rows by primary key, each kept for ``TTL``
+    seconds. Saves and deletes through the ORM invalidate the entry in this process
+    (see ``authentication.signals``); other processes and ``QuerySet.update()`` calls
+    are only caught up by the TTL. Callers get their own copy of the cached user.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """The user with ``user_id``; raises ``UserAccount.DoesNotExist`` if there is none."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+        if entry is not None and entry[0] > now:
+            return copy.copy(entry[1])
+
+        user = UserAccount.objects.get(pk=user_id)
+        with self._lock:
+            if len(self._users) >= _setting('MAX_SIZE', MAX_SIZE):
+                self._users = {key: value for key, value in self._users.items() if value[0] > now}
+                if len(self._users) >= _setting('MAX_SIZE', MAX_SIZE):
+                    self._users.pop(next(iter(self._users)))
+            self._users[user_id] = (now + _setting('TTL', TTL), user)
+        return copy.copy(user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+users = UserCache()
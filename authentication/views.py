@@ -1,8 +1,61 @@
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
+from dj_rest_auth.jwt_auth import get_refresh_view
 from dj_rest_auth.registration.views import SocialLoginView
+from django.utils.dateparse import parse_datetime
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+
+from authentication.models import ActivtyLog
+from authentication.serializers import ActivityLogSerializer
+from authentication.tokens import ClaimsTokenRefreshSerializer
 
 
 class GoogleLogin(SocialLoginView):
     adapter_class = GoogleOAuth2Adapter 
-    client_class = OAuth2Client
\ No newline at end of file
+    client_class = OAuth2Client
+
+
+class ClaimsTokenRefreshView(get_refresh_view()):
+    """dj-rest-auth's refresh view, cookies included, issuing tokens with current claims."""
+    serializer_class = ClaimsTokenRefreshSerializer
+
+
+class ActivityLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Activity log for staff, newest first. Filter with ``?actor=<user id>``,
+    ``?action_type=``, ``?status=`` and ``?since=``/``?until=`` (ISO 8601); actor and time
+    filters are served by the ``(actor, action_time)`` index.
+    """
+    queryset = ActivtyLog.objects.all()
+    serializer_class = ActivityLogSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        queryset = self.queryset.order_by('-action_time', '-id')
+        params = self.request.query_params
+
+        if params.get('actor'):
+            try:
+                queryset = queryset.filter(actor_id=int(params['actor']))
+            except ValueError:
+                raise ValidationError({'actor': 'Must be a user id.'})
+        if params.get('action_type'):
+            queryset = queryset.filter(action_type=params['action_type'])
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+
+        since = self.parse_time('since')
+        if since is not None:
+            queryset = queryset.filter(action_time__gte=since)
+        until = self.parse_time('until')
+        if until is not None:
+            queryset = queryset.filter(action_time__lt=until)
+        return queryset
+
+    def parse_time(self, name):
+        try:
+            return parse_datetime(self.request.query_params.get(name) or '')
+        except ValueError:
+            raise ValidationError({name: 'Must be a valid ISO 8601 date and time.'})
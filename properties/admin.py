@@ -14,3 +14,6 @@ admin.site.register(Auction)
 admin.site.register(HomeLoan)
 admin.site.register(Criteria)
 admin.site.register(RequestedTour)
+admin.site.register(Bid)
+admin.site.register(PropertyPriceHistory)
+admin.site.register(PropertyChange)
@@ -0,0 +1,139 @@
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.tokens import ClaimsTokenObtainPairSerializer
+from properties import response_cache
+from properties.models import Property
+
+# Resources whose list responses the scenarios read through the response cache.
+CACHED_RESOURCES = ('property', 'auction', 'home_loan')
+
+
+class Scenario:
+    """One endpoint call; ``request(client, iteration)`` returns the response."""
+
+    def __init__(self, name, user, request):
+        self.name = name
+        self.user = user
+        self.request = request
+
+
+def _toggle_wishlist(context):
+    listings = context['listings']
+
+    def request(client, iteration):
+        return client.post('/wishlist/add_items/', {
+            'item_id': str(listings[iteration // 2 % len(listings)]),
+            'is_wishlisted': 'true' if iteration % 2 == 0 else 'false',
+            'is_property': 'true',
+        }, format='json')
+    return request
+
+
+def scenarios(context):
+    return [
+        Scenario('property-list', 'customer', lambda client, i: client.get('/properties/?limit=20')),
+        Scenario('property-list-card', 'customer', lambda client, i: client.get('/properties/?limit=20&view=card')),
+        Scenario('property-list-anonymous', None, lambda client, i: client.get('/properties/?limit=20')),
+        Scenario('property-search', 'agent', lambda client, i: client.post(
+            '/properties/search/?limit=20',
+            {'type': 'Apartment', 'min_price': 1_000_000, 'bedroom': 2},
+            format='json',
+        )),
+        Scenario('property-search-geo', 'agent', lambda client, i: client.post(
+            '/properties/search/?limit=20',
+            {'latitude': 9.0, 'longitude': 38.8, 'radius': 5},
+            format='json',
+        )),
+        Scenario('wishlist-add-items', 'customer', _toggle_wishlist(context)),
+        Scenario('home-loan-list', 'customer', lambda client, i: client.get('/home-loan/?limit=20')),
+    ]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(values) - 1, round(fraction * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def client_for(user):
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}')
+    return client
+
+
+def measure(scenario, client, iterations, warmup, memory_iterations):
+    for iteration in range(warmup):
+        scenario.request(client, iteration)
+
+    latencies, queries, statuses = [], [], set()
+    for iteration in range(warmup, warmup + iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = scenario.request(client, iteration)
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(captured.captured_queries))
+        statuses.add(response.status_code)
+
+    # tracemalloc slows everything down, so memory is measured in a separate pass.
+    peak = 0
+    tracemalloc.start()
+    try:
+        for iteration in range(memory_iterations):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            scenario.request(client, warmup + iterations + iteration)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'iterations': iterations,
+        'status_codes': sorted(statuses),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'max_queries': max(queries),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run(users, iterations=50, warmup=5, memory_iterations=5, only=None):
+    """
+    Drive each scenario through the test client against the current database and return
+    a JSON-serializable report. ``users`` maps 'agent' and 'customer' to seeded users.
+    """
+    context = {'listings': list(Property.objects.order_by('id').values_list('id', flat=True)[:50])}
+    results = {}
+    for scenario in scenarios(context):
+        if only and scenario.name not in only:
+            continue
+        # New collection versions start each scenario cold without clearing a shared cache.
+        for resource in CACHED_RESOURCES:
+            response_cache.bump(resource)
+        client = client_for(users.get(scenario.user) if scenario.user else None)
+        results[scenario.name] = measure(scenario, client, iterations, warmup, memory_iterations)
+
+    return {
+        'meta': {
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'iterations': iterations,
+            'warmup': warmup,
+        },
+        'results': results,
+    }
@@ -0,0 +1,72 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from properties import events, response_cache
+from properties.models import Auction, Bid
+
+
+class BidRejected(Exception):
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class AuctionNotFound(BidRejected):
+    pass
+
+
+def highest_bid(auction_id):
+    """The leading bid of an auction, read through ``bid_auction_amount_idx``."""
+    return Bid.objects.filter(auction_id=auction_id).order_by('-amount', 'created_at').first()
+
+
+def _rejection(auction_id, now):
+    auction = Auction.objects.filter(pk=auction_id).only(
+        'status', 'start_date', 'end_date', 'starting_bid', 'current_bid'
+    ).first()
+    if auction is None:
+        return AuctionNotFound('Auction not found')
+    if auction.status in Auction.CLOSED_STATUSES or auction.end_date <= now:
+        return BidRejected('Auction is closed')
+    if auction.start_date > now:
+        return BidRejected('Auction has not started')
+    if auction.current_bid is None:
+        return BidRejected('Bid must be higher than starting bid')
+    return BidRejected('Bid must be higher than current bid')
+
+
+def place_bid(auction_id, bidder, amount):
+    """
+    Record a bid if it beats the current one.
+
+    The comparison happens inside a single conditional UPDATE of the auction row, so
+    concurrent bids serialize on that row's lock and each one is checked against the
+    amount committed before it: a lower bid can never overwrite a higher one. The Bid
+    row is inserted in the same transaction.
+    """
+    try:
+        auction_id = uuid.UUID(str(auction_id))
+    except ValueError:
+        raise AuctionNotFound('Auction not found')
+
+    now = timezone.now()
+    beats_current = Q(current_bid__isnull=True, starting_bid__lte=amount) | Q(current_bid__lt=amount)
+
+    with transaction.atomic():
+        accepted = Auction.objects.filter(
+            beats_current, pk=auction_id, start_date__lte=now, end_date__gt=now
+        ).exclude(status__in=Auction.CLOSED_STATUSES).update(
+            current_bid=amount,
+            bid_count=F('bid_count') + 1,
+            updated_at=now,
+        )
+        if not accepted:
+            raise _rejection(auction_id, now)
+        bid = Bid.objects.create(auction_id=auction_id, bidder=bidder, amount=amount)
+
+    response_cache.bump('auction', [auction_id])
+    events.broker.notify(auction_id)
+    return bid
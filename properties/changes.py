@@ -0,0 +1,84 @@
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from properties.models import PropertyChange
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+# Changes younger than this are held back, so a transaction that took a lower id but
+# commits after a client read past it is still delivered.
+SETTLE_SECONDS = 2
+
+# When one property changes several ways in a block, the strongest action is recorded.
+PRIORITY = {PropertyChange.UPDATE: 0, PropertyChange.SOLD_OUT: 1, PropertyChange.CREATE: 2, PropertyChange.DELETE: 3}
+
+_state = threading.local()
+
+
+def write(entries):
+    PropertyChange.objects.bulk_create([
+        PropertyChange(property_id=property_id, action=action) for property_id, action in entries
+    ])
+
+
+def record(action, property_ids):
+    """Log ``action`` for ``property_ids`` now, or once at the end of the enclosing ``deferred()`` block."""
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        write((property_id, action) for property_id in dict.fromkeys(property_ids))
+        return
+    for property_id in property_ids:
+        current = pending.get(property_id)
+        if current is None or PRIORITY[action] > PRIORITY[current]:
+            pending[property_id] = action
+
+
+@contextmanager
+def deferred():
+    """Collect the changes recorded inside the block and write one row per property on exit."""
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+
+    _state.pending = {}
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    write(pending.items())
+
+
+def settled_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, 'PROPERTY_CHANGES_SETTLE_SECONDS', SETTLE_SECONDS))
+
+
+def current_cursor():
+    """
+    The cursor a full snapshot taken now corresponds to: following the feed from it
+    replays everything that may have changed since, possibly some changes twice.
+    """
+    # Walks the primary key backwards past the few unsettled entries.
+    latest = PropertyChange.objects.filter(created_at__lte=settled_before()).order_by('-id').values_list('id', flat=True)
+    return latest.first() or 0
+
+
+def feed(since=0, limit=DEFAULT_LIMIT):
+    """
+    The properties changed after cursor ``since``, each once with its latest cursor and
+    action, in cursor order. Returns ``(entries, has_more)``; entries are
+    ``(cursor, property_id, action)``.
+    """
+    latest = list(
+        PropertyChange.objects.filter(id__gt=since, created_at__lte=settled_before())
+        .values('property_id').annotate(cursor=Max('id')).order_by('cursor')
+        .values_list('cursor', flat=True)[:limit + 1]
+    )
+    has_more = len(latest) > limit
+    entries = PropertyChange.objects.filter(id__in=latest[:limit]).values_list('id', 'property_id', 'action')
+    return list(entries), has_more
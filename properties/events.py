@@ -0,0 +1,189 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from properties.models import Auction, Bid
+
+POLL_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 15
+# Answered well inside the 10 s maxDuration of the serverless functions (vercel.json).
+LONG_POLL_TIMEOUT = 8
+QUEUE_SIZE = 100
+
+
+def _setting(name, default):
+    return getattr(settings, f'AUCTION_EVENTS_{name}', default)
+
+
+def bid_event(bid, sequence):
+    return {
+        'id': sequence,
+        'event': 'bid',
+        'data': {'id': bid.id, 'amount': bid.amount, 'bidder': bid.bidder_id, 'created_at': bid.created_at},
+    }
+
+
+def state_event(state):
+    return {'id': state['bid_count'], 'event': 'state', 'data': state}
+
+
+def format_sse(event):
+    data = json.dumps(event['data'], cls=JSONEncoder)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+def load_state(auction_id):
+    return Auction.objects.filter(pk=auction_id).values('status', 'current_bid', 'bid_count').first()
+
+
+def load_bids(auction_id, after, upto):
+    """
+    Bids number ``after + 1`` to ``upto`` in acceptance order. ``properties.bidding`` only
+    accepts strictly higher amounts, so ascending amount order is acceptance order and a
+    bid's position is the auction's ``bid_count`` right after it was placed.
+    """
+    bids = Bid.objects.filter(auction_id=auction_id).order_by('amount')[after:upto]
+    return [bid_event(bid, sequence) for sequence, bid in enumerate(bids, start=after + 1)]
+
+
+class Topic:
+    def __init__(self, auction_id, state):
+        self.auction_id = auction_id
+        self.state = state
+        self.subscribers = set()
+        self.wake = asyncio.Event()
+        self.task = None
+
+
+class Broker:
+    """
+    In-process fan-out of auction events. Each auction with subscribers gets one task
+    that polls the auction row and pushes new bids and status changes to every
+    subscriber's queue, so a hot auction costs one query per interval however many
+    clients watch it. ``notify`` wakes the task early when a bid is placed in this
+    process; bids from other processes and scheduler runs are seen on the next poll.
+    """
+
+    def __init__(self):
+        self.topics = {}
+        self.loop = None
+
+    async def subscribe(self, auction_id):
+        """Register a queue for ``auction_id`` and return it with the auction's current state."""
+        self.loop = asyncio.get_running_loop()
+        topic = self.topics.get(auction_id)
+        if topic is not None and topic.task is not None and topic.task.get_loop() is not self.loop:
+            # Left over from an event loop that has since shut down.
+            topic = None
+        if topic is None:
+            state = await sync_to_async(load_state)(auction_id)
+            if state is None:
+                return None, None
+            topic = self.topics.get(auction_id)
+            if topic is None or topic.task is None or topic.task.get_loop() is not self.loop:
+                topic = self.topics[auction_id] = Topic(auction_id, state)
+        queue = asyncio.Queue()
+        topic.subscribers.add(queue)
+        if topic.task is None:
+            topic.task = asyncio.create_task(self._run(topic))
+        return queue, topic.state
+
+    def unsubscribe(self, auction_id, queue):
+        topic = self.topics.get(auction_id)
+        if topic is not None:
+            topic.subscribers.discard(queue)
+
+    def notify(self, auction_id):
+        """Wake the auction's poller; safe to call from any thread."""
+        topic = self.topics.get(auction_id)
+        if topic is not None and self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(topic.wake.set)
+
+    def _publish(self, topic, event):
+        for queue in list(topic.subscribers):
+            if queue.qsize() >= QUEUE_SIZE:
+                # A client this far behind is disconnected and resumes from its last event id.
+                topic.subscribers.discard(queue)
+                queue.put_nowait(None)
+            else:
+                queue.put_nowait(event)
+
+    async def _run(self, topic):
+        try:
+            while topic.subscribers:
+                try:
+                    await asyncio.wait_for(topic.wake.wait(), _setting('POLL_INTERVAL', POLL_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+                topic.wake.clear()
+
+                state = await sync_to_async(load_state)(topic.auction_id)
+                if state is None or state == topic.state:
+                    continue
+                previous, topic.state = topic.state, state
+                if state['bid_count'] > previous['bid_count']:
+                    bids = await sync_to_async(load_bids)(topic.auction_id, previous['bid_count'], state['bid_count'])
+                    for event in bids:
+                        self._publish(topic, event)
+                if state['status'] != previous['status']:
+                    self._publish(topic, state_event(state))
+        finally:
+            self.topics.pop(topic.auction_id, None)
+            for queue in topic.subscribers:
+                queue.put_nowait(None)
+
+
+broker = Broker()
+
+
+async def replay(auction_id, last_event_id, state):
+    """Events a client resuming from ``last_event_id`` missed, ending with the current state."""
+    events = []
+    if last_event_id is not None and last_event_id < state['bid_count']:
+        events = await sync_to_async(load_bids)(auction_id, last_event_id, state['bid_count'])
+    return events + [state_event(state)]
+
+
+async def stream(auction_id, queue, missed):
+    """Server-Sent Events for one subscriber, with periodic keep-alive comments."""
+    try:
+        for event in missed:
+            yield format_sse(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), _setting('HEARTBEAT_INTERVAL', HEARTBEAT_INTERVAL))
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event is None:
+                return
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(auction_id, queue)
+
+
+async def wait_for_events(auction_id, queue, missed, resuming, timeout=None):
+    """
+    Long-poll: a first request, or one that missed bids, is answered at once; otherwise
+    wait up to ``timeout`` (default ``LONG_POLL_TIMEOUT``) for the next events.
+    """
+    if timeout is None:
+        timeout = _setting('LONG_POLL_TIMEOUT', LONG_POLL_TIMEOUT)
+    try:
+        if not resuming or len(missed) > 1:
+            return missed
+        try:
+            event = await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        events = [event] if event is not None else []
+        while not queue.empty():
+            event = queue.get_nowait()
+            if event is not None:
+                events.append(event)
+        return events
+    finally:
+        broker.unsubscribe(auction_id, queue)
@@ -0,0 +1,81 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from properties import response_cache
+from properties.models import Property
+
+PRICE_BUCKETS = [0, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, None]
+ROOM_MINIMUMS = [1, 2, 3, 4, 5]
+DEFAULT_TIMEOUT = 60
+
+
+def price_buckets():
+    edges = getattr(settings, 'PROPERTY_PRICE_BUCKETS', PRICE_BUCKETS)
+    return list(zip(edges, edges[1:]))
+
+
+def aggregates(prefix='summary__'):
+    """Named ``Count`` expressions for every facet, evaluated in a single aggregate query."""
+    counts = {'total': Count('pk')}
+
+    for index, (value, _) in enumerate(Property.TYPE_CHOICES):
+        counts[f'type_{index}'] = Count('pk', filter=Q(**{f'{prefix}type': value}))
+
+    for index, (low, high) in enumerate(price_buckets()):
+        condition = Q(**{f'{prefix}price__gte': low})
+        if high is not None:
+            condition &= Q(**{f'{prefix}price__lt': high})
+        counts[f'price_{index}'] = Count('pk', filter=condition)
+
+    for room in ('bedroom', 'bathroom'):
+        for minimum in ROOM_MINIMUMS:
+            counts[f'{room}_{minimum}'] = Count('pk', filter=Q(**{f'{prefix}{room}__gte': minimum}))
+
+    counts['sale'] = Count('pk', filter=Q(**{f'{prefix}sold_out': False, f'{prefix}rental': False}))
+    counts['rental'] = Count('pk', filter=Q(**{f'{prefix}sold_out': False, f'{prefix}rental': True}))
+    counts['sold'] = Count('pk', filter=Q(**{f'{prefix}sold_out': True}))
+    return counts
+
+
+def count(queryset, prefix='summary__'):
+    """Facet counts of ``queryset`` shaped for the search sidebar."""
+    if not queryset.query.is_sliced:
+        queryset = queryset.order_by()
+    totals = queryset.aggregate(**aggregates(prefix))
+    return {
+        'total': totals['total'],
+        'type': {value: totals[f'type_{index}'] for index, (value, _) in enumerate(Property.TYPE_CHOICES)},
+        'price': [
+            {'min': low, 'max': high, 'count': totals[f'price_{index}']}
+            for index, (low, high) in enumerate(price_buckets())
+        ],
+        'bedroom': {str(minimum): totals[f'bedroom_{minimum}'] for minimum in ROOM_MINIMUMS},
+        'bathroom': {str(minimum): totals[f'bathroom_{minimum}'] for minimum in ROOM_MINIMUMS},
+        'status': {name: totals[name] for name in ('sale', 'rental', 'sold')},
+    }
+
+
+def cache_key(data, params=None):
+    # The collection version changes on every property write, so stale counts are never served.
+    # Query parameters such as ?type= and ?status= filter the queryset too.
+    params = {key: sorted(params.getlist(key)) for key in params} if params else {}
+    body = json.dumps([data, params], sort_keys=True, default=str)
+    fingerprint = hashlib.md5(body.encode('utf-8')).hexdigest()
+    return f'facets:{response_cache.get_version("property")}:{fingerprint}'
+
+
+def cached_count(data, queryset_for, params=None):
+    """
+    Counts for the filter body ``data`` and query parameters ``params``, reusing a recent
+    result for the same filters.
+    """
+    cache = response_cache.get_cache()
+    key = cache_key(data, params)
+    result = cache.get(key)
+    if result is None:
+        result = count(queryset_for(data))
+        cache.set(key, result, getattr(settings, 'FACETS_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return result
@@ -0,0 +1,197 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, Func, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from properties import streaming
+from properties.models import Auction, HomeLoan, Property, SearchEntry
+
+FTS_TABLE = 'properties_searchentry_fts'
+
+DEFAULT_BACKENDS = {
+    'postgresql': 'properties.fulltext.PostgresSearchBackend',
+    'sqlite': 'properties.fulltext.SQLiteSearchBackend',
+}
+
+ENTRY_FIELDS = {
+    Property: 'property',
+    Auction: 'auction',
+    HomeLoan: 'home_loan',
+}
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 16
+REBUILD_CHUNK_SIZE = 2000
+
+
+def terms(query):
+    return _TERM_RE.findall(str(query).lower())[:MAX_TERMS]
+
+
+class BaseSearchBackend:
+    def refresh(self, entries):
+        """Bring any backend-maintained index data up to date for ``entries``."""
+
+    def rebuild(self):
+        self.refresh(SearchEntry.objects.all())
+
+    def search(self, queryset, query):
+        """Filter ``queryset`` to matches of ``query`` and annotate ``search_rank``."""
+        raise NotImplementedError
+
+    def no_matches(self, queryset):
+        # Still annotated, so callers can order by search_rank.
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Unindexed substring matching, for databases without a dedicated backend."""
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(search_entry__name__icontains=query) |
+            Q(search_entry__description__icontains=query) |
+            Q(search_entry__location__icontains=query)
+        ).annotate(
+            search_rank=Case(
+                When(search_entry__name__icontains=query, then=Value(1.0)),
+                default=Value(0.5),
+                output_field=FloatField(),
+            )
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    config = 'simple'
+
+    def refresh(self, entries):
+        entries.update(
+            vector=(
+                SearchVector('name', weight='A', config=self.config) +
+                SearchVector('location', weight='B', config=self.config) +
+                SearchVector('description', weight='C', config=self.config)
+            )
+        )
+
+    def search(self, queryset, query):
+        words = terms(query)
+        if not words:
+            return self.no_matches(queryset)
+
+        tsquery = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=self.config)
+        return queryset.filter(search_entry__vector=tsquery).annotate(
+            search_rank=SearchRank(F('search_entry__vector'), tsquery)
+        )
+
+
+class FTS5Rank(Func):
+    output_field = FloatField()
+
+    def __init__(self, expression, match):
+        super().__init__(expression)
+        self.match = match
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        # bm25() is lower-is-better and weights columns in declaration order: name, description, location.
+        return (
+            f'(SELECT -bm25({FTS_TABLE}, 10.0, 1.0, 5.0) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {sql})',
+            [self.match, *params],
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 backend; the index table is kept in sync by triggers created in the migrations."""
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    def search(self, queryset, query):
+        words = terms(query)
+        if not words:
+            return self.no_matches(queryset)
+
+        match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.filter(
+            search_entry__id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(
+            search_rank=FTS5Rank(F('search_entry__id'), match)
+        )
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', None) or DEFAULT_BACKENDS.get(
+            connection.vendor, 'properties.fulltext.SimpleSearchBackend'
+        )
+        _backend = import_string(path)()
+    return _backend
+
+
+def search(queryset, query):
+    """Relevance-ranked full-text search over a Property, Auction or HomeLoan queryset."""
+    queryset = get_backend().search(queryset, query)
+    return queryset.order_by('-search_rank', *queryset.model._meta.ordering)
+
+
+DOCUMENT_FIELDS = {'name', 'description', 'location'}
+
+
+def document(instance):
+    location = getattr(instance, 'location', None)
+    return {
+        'name': instance.name,
+        'description': instance.description or '',
+        'location': location.name if location else '',
+    }
+
+
+def index(instance):
+    index_many([instance])
+
+
+def index_many(instances):
+    """Upsert search entries for many instances of the same model in one statement."""
+    instances = list(instances)
+    if not instances:
+        return
+    field = ENTRY_FIELDS[type(instances[0])]
+    SearchEntry.objects.bulk_create(
+        [SearchEntry(**{field: instance}, **document(instance)) for instance in instances],
+        update_conflicts=True,
+        unique_fields=[field],
+        update_fields=['name', 'description', 'location'],
+    )
+    get_backend().refresh(SearchEntry.objects.filter(**{f'{field}__in': instances}))
+
+
+def reindex_location(location):
+    stale = list(
+        SearchEntry.objects.filter(
+            Q(property__location=location) | Q(auction__location=location)
+        ).exclude(location=location.name).values_list('id', flat=True)
+    )
+    if stale:
+        SearchEntry.objects.filter(id__in=stale).update(location=location.name)
+        get_backend().refresh(SearchEntry.objects.filter(id__in=stale))
+
+
+def rebuild():
+    SearchEntry.objects.all().delete()
+    for model in ENTRY_FIELDS:
+        queryset = model.objects.all()
+        if hasattr(model, 'location'):
+            queryset = queryset.select_related('location')
+        for chunk in streaming.iter_keyset_chunks(queryset.order_by('pk'), REBUILD_CHUNK_SIZE):
+            index_many(chunk)
+    get_backend().rebuild()
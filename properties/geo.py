@@ -0,0 +1,189 @@
+import math
+
+from django.db.models import F, Q, Value, FloatField
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_BASE32_INDEX = {c: i for i, c in enumerate(_BASE32)}
+
+# Approximate (width, height) in km of a geohash cell at the equator, by precision.
+_CELL_SIZES_KM = {
+    1: (5009.4, 4992.6),
+    2: (1252.3, 624.1),
+    3: (156.5, 156.0),
+    4: (39.1, 19.5),
+    5: (4.89, 4.89),
+    6: (1.22, 0.61),
+    7: (0.153, 0.153),
+    8: (0.0382, 0.0191),
+    9: (0.00477, 0.00477),
+}
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_range[0] = mid
+            else:
+                bits = bits << 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits = bits << 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(geohash)
+
+
+def bounds(geohash):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+
+def neighbours(geohash):
+    """Return the cell itself and the eight cells surrounding it."""
+    min_lat, max_lat, min_lng, max_lng = bounds(geohash)
+    lat_step = max_lat - min_lat
+    lng_step = max_lng - min_lng
+    center_lat = (min_lat + max_lat) / 2
+    center_lng = (min_lng + max_lng) / 2
+
+    cells = set()
+    for dlat in (-1, 0, 1):
+        lat = center_lat + dlat * lat_step
+        if lat < -90 or lat > 90:
+            continue
+        for dlng in (-1, 0, 1):
+            lng = center_lng + dlng * lng_step
+            lng = (lng + 180) % 360 - 180
+            cells.add(encode(lat, lng, len(geohash)))
+    return cells
+
+
+def cell_span_km(precision, latitude=0.0):
+    """Smallest extent of a cell at ``precision`` around ``latitude``."""
+    width, height = _CELL_SIZES_KM[precision]
+    return min(width * math.cos(math.radians(latitude)), height)
+
+
+def precision_for_radius(radius_km, latitude=0.0):
+    """Finest precision whose 3x3 neighbourhood still covers ``radius_km``."""
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        if cell_span_km(precision, latitude) >= radius_km:
+            return precision
+    return 1
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Cells whose union covers the circle, or ``None`` if it is wider than any cell."""
+    precision = precision_for_radius(radius_km, latitude)
+    if cell_span_km(precision, latitude) < radius_km:
+        return None
+    return neighbours(encode(latitude, longitude, precision))
+
+
+def cells_filter(cells, field='geohash'):
+    # Range lookups rather than startswith so a plain btree index is usable on every backend.
+    query = Q()
+    for cell in cells:
+        query |= Q(**{f'{field}__gte': cell, f'{field}__lt': cell + '~'})
+    return query
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def distance_expression(latitude, longitude, lat_field='geo_lat', lng_field='geo_lng'):
+    lat = Radians(Value(latitude, output_field=FloatField()))
+    lng = Radians(Value(longitude, output_field=FloatField()))
+    row_lat = Radians(F(lat_field))
+    row_lng = Radians(F(lng_field))
+
+    a = (
+        Power(Sin((row_lat - lat) / 2), 2)
+        + Cos(lat) * Cos(row_lat) * Power(Sin((row_lng - lng) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0, output_field=FloatField())))
+
+
+def annotate_distance(queryset, latitude, longitude, prefix=''):
+    return queryset.annotate(
+        distance_km=distance_expression(latitude, longitude, f'{prefix}geo_lat', f'{prefix}geo_lng')
+    )
+
+
+def within_radius(queryset, latitude, longitude, radius_km, prefix=''):
+    """
+    Restrict ``queryset`` to rows within ``radius_km`` of the point, annotated with
+    ``distance_km`` and ordered nearest first.
+    """
+    cells = covering_cells(latitude, longitude, radius_km)
+    if cells is not None:
+        queryset = queryset.filter(cells_filter(cells, f'{prefix}geohash'))
+    return annotate_distance(queryset, latitude, longitude, prefix).filter(
+        distance_km__lte=radius_km
+    ).order_by('distance_km')
+
+
+def nearest(queryset, latitude, longitude, k, prefix=''):
+    """
+    Return the ``k`` rows closest to the point. Starts from a small neighbourhood and
+    widens it until enough candidates are found, then falls back to an exact radius
+    query if the k-th candidate could be beaten by a row outside the neighbourhood.
+    """
+    if k < 1:
+        raise ValueError('k must be at least 1')
+    for precision in range(GEOHASH_PRECISION - 2, 0, -1):
+        cells = neighbours(encode(latitude, longitude, precision))
+        candidates = annotate_distance(
+            queryset.filter(cells_filter(cells, f'{prefix}geohash')), latitude, longitude, prefix
+        ).order_by('distance_km')
+        distances = list(candidates.values_list('distance_km', flat=True)[:k])
+        if len(distances) < k:
+            continue
+        if distances[-1] <= cell_span_km(precision, latitude):
+            return candidates[:k]
+        return within_radius(queryset, latitude, longitude, distances[-1], prefix)[:k]
+
+    return annotate_distance(queryset, latitude, longitude, prefix).order_by('distance_km')[:k]
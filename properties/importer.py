@@ -0,0 +1,174 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import DatabaseError, transaction
+from rest_framework import serializers
+
+from properties import changes, fulltext, response_cache, summary
+from properties.models import Amenties, Image, LoanerProperty, Location, Property, PropertyChange
+from properties.serializers import PropertyImportSerializer, resolve_loaners
+
+CHUNK_SIZE = 1000
+FORMATS = ('csv', 'jsonl')
+
+LOCATION_COLUMNS = {'location_name': 'name', 'latitude': 'latitude', 'longitude': 'longitude'}
+AMENTIES_COLUMNS = ['bedroom', 'bathroom', 'area']
+LIST_SEPARATOR = '|'
+
+
+def detect_format(filename):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension == 'csv':
+        return 'csv'
+    return None
+
+
+def _split_list(value):
+    return [item.strip() for item in (value or '').split(LIST_SEPARATOR) if item.strip()]
+
+
+def csv_row(row):
+    """
+    Turn a flat CSV row into the nested shape of a property payload. ``pictures`` and
+    ``loaners`` hold ``|``-separated image URLs and loaner names; the first picture is the cover.
+    """
+    row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+    data = {key: value for key, value in row.items() if value != ''}
+    data['location'] = {field: data.pop(column, None) for column, field in LOCATION_COLUMNS.items()}
+    data['amenties'] = {column: data.pop(column, None) for column in AMENTIES_COLUMNS}
+    data['pictures'] = [
+        {'image_url': url, 'is_cover': index == 0}
+        for index, url in enumerate(_split_list(data.pop('pictures', '')))
+    ]
+    data['loaners'] = [{'name': name} for name in _split_list(data.pop('loaners', ''))]
+    return data
+
+
+def read_rows(stream, import_format):
+    """
+    Yield ``(row_number, data)`` from a text stream; unparseable rows yield an exception
+    instead. Reading stops at the first bytes that do not decode, reported as the next row.
+    """
+    number = 0
+    try:
+        for number, data in _parse_rows(stream, import_format):
+            yield number, data
+    except UnicodeDecodeError:
+        yield number + 1, serializers.ValidationError(
+            {'non_field_errors': ['The file is not valid UTF-8; it was not read past this row.']}
+        )
+
+
+def _parse_rows(stream, import_format):
+    if import_format == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, csv_row(row)
+    elif import_format == 'jsonl':
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError as exc:
+                yield number, serializers.ValidationError({'non_field_errors': [f'Invalid JSON: {exc}']})
+    else:
+        raise ValueError(f'Unsupported import format {import_format!r}, expected one of: {", ".join(FORMATS)}')
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def fail(self, number, detail):
+        self.errors.append({'row': number, 'errors': detail})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+
+def validate(rows, result):
+    validator = PropertyImportSerializer()
+    valid = []
+    for number, data in rows:
+        if isinstance(data, Exception):
+            result.fail(number, data.detail)
+            continue
+        if not isinstance(data, dict):
+            result.fail(number, {'non_field_errors': ['Expected an object.']})
+            continue
+        try:
+            valid.append((number, validator.run_validation(data)))
+        except serializers.ValidationError as exc:
+            result.fail(number, exc.detail)
+    return valid
+
+
+def write(rows, created_by=None):
+    """Insert validated rows with one ``bulk_create`` per table and return the new properties."""
+    locations, properties, amenties, images, links = [], [], [], [], []
+    loaners = resolve_loaners([loaner for _, data in rows for loaner in data.get('loaners', [])])
+
+    for _, data in rows:
+        data = dict(data)
+        location = Location(**data.pop('location'))
+        location.update_geo()
+        amenties_data = data.pop('amenties')
+        pictures = data.pop('pictures', [])
+        row_loaners = data.pop('loaners', [])
+
+        listing = Property(location=location, created_by=created_by, **data)
+        locations.append(location)
+        properties.append(listing)
+        amenties.append(Amenties(property=listing, **amenties_data))
+        images += [Image(property=listing, **picture) for picture in pictures]
+        links += [LoanerProperty(property=listing, loaner=loaners[loaner['name']]) for loaner in row_loaners]
+
+    Location.objects.bulk_create(locations)
+    Property.objects.bulk_create(properties)
+    Amenties.objects.bulk_create(amenties)
+    Image.objects.bulk_create(images)
+    LoanerProperty.objects.bulk_create(links)
+
+    # bulk_create skips save() and signals, so the derived tables are refreshed here.
+    fulltext.index_many(properties)
+    summary.refresh([listing.pk for listing in properties])
+    changes.record(PropertyChange.CREATE, [listing.pk for listing in properties])
+    return properties
+
+
+def run(rows, created_by=None, chunk_size=CHUNK_SIZE):
+    """
+    Validate and insert ``(row_number, data)`` pairs chunk by chunk. Each chunk is written
+    in its own transaction; invalid rows and chunks that fail to write are reported per
+    row without stopping the import.
+    """
+    result = ImportResult()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        valid = validate(chunk, result)
+        if not valid:
+            continue
+        try:
+            with transaction.atomic():
+                result.created += len(write(valid, created_by))
+        except DatabaseError as exc:
+            for number, _ in valid:
+                result.fail(number, {'non_field_errors': [f'Could not be saved: {exc}']})
+
+    if result.created:
+        response_cache.bump('property')
+    result.errors.sort(key=lambda error: error['row'])
+    return result
+
+
+def import_stream(stream, import_format, created_by=None, chunk_size=CHUNK_SIZE):
+    return run(read_rows(stream, import_format), created_by=created_by, chunk_size=chunk_size)
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from properties import scheduler
+
+
+class Command(BaseCommand):
+    help = 'Move auctions between PENDING, ACTIVE and COMPLETED based on their start and end dates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=scheduler.BATCH_SIZE)
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running, advancing statuses every INTERVAL seconds (default: run once)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            counts = scheduler.advance_statuses(batch_size=options['batch_size'])
+            self.stdout.write(f"Completed {counts['completed']}, activated {counts['activated']} auctions")
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from properties import benchmark, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main API endpoints against a freshly seeded test database '
+        '(SQLite or PostgreSQL, per DATABASES) and report latency percentiles, queries and memory'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help='Number of seeded properties')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--memory-iterations', type=int, default=5)
+        parser.add_argument('--scenario', action='append', dest='scenarios', help='Only run this scenario (repeatable)')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            # Background activity-log writes would add noise unrelated to the endpoint itself.
+            with override_settings(ACTIVITY_LOG_ENABLED=False):
+                users = seed.seed(size=options['size'], seed=options['seed'])
+                report = benchmark.run(
+                    users,
+                    iterations=options['iterations'],
+                    warmup=options['warmup'],
+                    memory_iterations=options['memory_iterations'],
+                    only=options['scenarios'],
+                )
+        finally:
+            teardown_databases(databases, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report['meta'].update(size=options['size'], seed=options['seed'])
+        for name, result in report['results'].items():
+            self.stdout.write(
+                f"{name:<26} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+                f"p99 {result['p99_ms']:>8.2f}ms  {result['queries_per_request']:>5} queries  "
+                f"{result['peak_memory_kb']:>8.1f}KB  {result['status_codes']}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
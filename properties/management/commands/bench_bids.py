@@ -0,0 +1,67 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from authentication.models import UserAccount
+from properties.models import Auction, Location
+from properties.testing import check_bids, concurrent_bids
+
+
+class Command(BaseCommand):
+    help = 'Fire parallel bids at a scratch auction and check that none were lost'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bids', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--bidders', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the scratch auction afterwards')
+
+    def handle(self, *args, **options):
+        bidders = list(UserAccount.objects.all()[:options['bidders']])
+        if not bidders:
+            raise CommandError('At least one user is needed to place bids')
+
+        amounts = [100 + index for index in range(options['bids'])]
+        random.Random(options['seed']).shuffle(amounts)
+
+        location = Location.objects.create(name='Bid benchmark', latitude=0, longitude=0)
+        auction = Auction.objects.create(
+            name='Bid benchmark',
+            description='Scratch auction created by bench_bids',
+            location=location,
+            starting_bid=100,
+            start_date=timezone.now(),
+            end_date=timezone.now() + timedelta(hours=1),
+            status='ACTIVE',
+        )
+        try:
+            started = time.perf_counter()
+            results = concurrent_bids(auction.pk, bidders, amounts, workers=options['workers'])
+            elapsed = time.perf_counter() - started
+
+            for error in results['errors'][:5]:
+                self.stderr.write(f'Database error: {error}')
+            check_bids(auction, amounts, results['accepted'])
+
+            latencies = sorted(results['latencies'])
+            quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+            self.stdout.write(
+                f"{len(amounts)} bids from {options['workers']} workers in {elapsed:.2f}s "
+                f"({len(amounts) / elapsed:.0f}/s): {len(results['accepted'])} accepted, "
+                f"{len(results['rejected'])} rejected, {len(results['errors'])} errors"
+            )
+            self.stdout.write(
+                f'latency p50 {quantiles[49] * 1000:.1f}ms, p95 {quantiles[94] * 1000:.1f}ms, '
+                f'p99 {quantiles[98] * 1000:.1f}ms'
+            )
+            if results['errors']:
+                raise CommandError(f"{len(results['errors'])} bids failed with database errors")
+            self.stdout.write(self.style.SUCCESS('No bids lost'))
+        finally:
+            if not options['keep']:
+                location.delete()
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from properties import snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Write a gzip-compressed NDJSON snapshot of the property catalogue, with locations, '
+        'amenities, cover images and loaners. Its generation is the change feed cursor to resume from.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Defaults to catalogue-<generation>.ndjson.gz')
+        parser.add_argument('--include-sold-out', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=snapshot.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        generation, chunks = snapshot.export(options['include_sold_out'], options['chunk_size'])
+        output = options['output'] or f'catalogue-{generation}.ndjson.gz'
+
+        size = 0
+        with open(output, 'wb') as file:
+            for chunk in chunks:
+                file.write(chunk)
+                size += len(chunk)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {output} ({size} bytes, generation {generation}) in {elapsed:.1f}s'
+        ))
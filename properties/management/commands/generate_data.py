@@ -1,40 +1,35 @@
+import time
+
 from django.core.management.base import BaseCommand
-from properties.models import Loaners, Criteria, HomeLoan
-import uuid
-import random
-from faker import Faker
 
-class Command(BaseCommand):
-    help = 'Generate sample home loan data'
+from properties import seed
 
-    def handle(self, *args, **kwargs):
-        fake = Faker()
 
-        # Create Loaners
-        for _ in range(20):
-            Loaners.objects.create(
-                id=uuid.uuid4(),
-                logo=fake.image_url(),
-                name=fake.company(),
-                real_state_provided=random.choice([True, False]),
-                phone=fake.phone_number()
-            )
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic, production-shaped dataset: users, properties with locations, '
+        'amenities and images, auctions with bids, home loans, wishlists, reviews and tours. '
+        'Uses COPY on PostgreSQL and chunked bulk_create elsewhere.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=1000,
+            help='Number of properties; users, auctions, reviews, tours and loans are sized from it',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Runs with the same seed and scale generate the same rows')
+        parser.add_argument('--chunk-size', type=int, default=seed.CHUNK_SIZE)
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create even on PostgreSQL')
 
-        # Create Criteria
-        for _ in range(20):
-            Criteria.objects.create(
-                id=uuid.uuid4(),
-                description=fake.paragraph()
-            )
+    def handle(self, *args, **options):
+        seeder = seed.Seeder(options['seed'], options['chunk_size'], use_copy=False if options['no_copy'] else None)
+        started = time.perf_counter()
+        seeder.run(options['scale'], bench_users=False)
+        elapsed = time.perf_counter() - started
 
-        # Create Home Loans
-        loaners = Loaners.objects.all()
-        criterias = Criteria.objects.all()
-        for _ in range(20):
-            HomeLoan.objects.create(
-                id=uuid.uuid4(),
-                name=fake.catch_phrase(),
-                description=fake.paragraph(),
-                loaner=random.choice(loaners),
-                criterias=random.choice(criterias)
-            )
\ No newline at end of file
+        for label, count in sorted(seeder.writer.counts.items()):
+            self.stdout.write(f'{label:<40} {count:>10}')
+        total = sum(seeder.writer.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {total} rows in {elapsed:.1f}s ({'COPY' if seeder.writer.use_copy else 'bulk_create'})"
+        ))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from properties import importer
+
+
+class Command(BaseCommand):
+    help = 'Import property listings from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='import_format', choices=importer.FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=importer.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        import_format = options['import_format'] or importer.detect_format(options['path'])
+        if import_format is None:
+            raise CommandError('Could not tell the format from the file name, pass --format')
+
+        with open(options['path'], encoding='utf-8', newline='') as stream:
+            result = importer.import_stream(stream, import_format, chunk_size=options['chunk_size'])
+
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f'Imported {result.created} properties, {len(result.errors)} rows failed'))
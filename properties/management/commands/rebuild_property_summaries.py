@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from properties import summary
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized property summary table from the source models'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--missing', action='store_true', help='Only create the rows of properties that have none')
+
+    def handle(self, *args, **options):
+        if options['missing']:
+            count = summary.fill_missing(chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Created {count} missing property summaries'))
+            return
+        count = summary.rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} property summaries'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from properties import fulltext
+from properties.models import SearchEntry
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for properties, auctions and home loans'
+
+    def handle(self, *args, **kwargs):
+        fulltext.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {SearchEntry.objects.count()} entries'))
@@ -0,0 +1,93 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:25
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Criteria',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('description', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HomeLoan',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='auction',
+            options={'ordering': ['-created_at'], 'verbose_name_plural': 'Auctions'},
+        ),
+        migrations.AlterModelOptions(
+            name='property',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='requestedtour',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='wishlist',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='currency',
+            field=models.CharField(default='ETB', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='blur_hash',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='loaners',
+            name='logo',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='latitude',
+            field=models.DecimalField(decimal_places=20, max_digits=25),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='longitude',
+            field=models.DecimalField(decimal_places=20, max_digits=25),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saved_properties', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='property', to='properties.location'),
+        ),
+        migrations.AddField(
+            model_name='homeloan',
+            name='loaner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loaners', to='properties.loaners'),
+        ),
+        migrations.AddField(
+            model_name='criteria',
+            name='loan',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='criteria', to='properties.homeloan'),
+        ),
+    ]
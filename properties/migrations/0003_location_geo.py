@@ -0,0 +1,74 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:25
+
+from django.db import migrations, models
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(latitude, longitude, precision=9):
+    # A frozen copy of properties.geo.encode, so the migration does not change with it.
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = bit_count = 0
+    even = True
+    while len(chars) < precision:
+        target, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (target[0] + target[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            target[0] = mid
+        else:
+            bits = bits << 1
+            target[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = bit_count = 0
+    return ''.join(chars)
+
+
+def backfill_geo(apps, schema_editor):
+    Location = apps.get_model('properties', 'Location')
+    batch = []
+    for location in Location.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        location.geo_lat = float(location.latitude)
+        location.geo_lng = float(location.longitude)
+        location.geohash = geohash(location.geo_lat, location.geo_lng)
+        batch.append(location)
+        if len(batch) >= 2000:
+            Location.objects.bulk_update(batch, ['geo_lat', 'geo_lng', 'geohash'])
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, ['geo_lat', 'geo_lng', 'geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0002_model_drift'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geo_lat',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geo_lng',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['geohash', 'geo_lat', 'geo_lng'], name='location_geohash_idx'),
+        ),
+        migrations.RunPython(backfill_geo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:27
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+FTS_TABLE = 'properties_searchentry_fts'
+
+SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        name, description, location,
+        content='properties_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER properties_searchentry_ai AFTER INSERT ON properties_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description, location)
+        VALUES (new.id, new.name, new.description, new.location);
+    END""",
+    f"""CREATE TRIGGER properties_searchentry_ad AFTER DELETE ON properties_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, location)
+        VALUES ('delete', old.id, old.name, old.description, old.location);
+    END""",
+    f"""CREATE TRIGGER properties_searchentry_au AFTER UPDATE ON properties_searchentry BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description, location)
+        VALUES ('delete', old.id, old.name, old.description, old.location);
+        INSERT INTO {FTS_TABLE}(rowid, name, description, location)
+        VALUES (new.id, new.name, new.description, new.location);
+    END""",
+]
+
+SQLITE_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS properties_searchentry_ai',
+    'DROP TRIGGER IF EXISTS properties_searchentry_ad',
+    'DROP TRIGGER IF EXISTS properties_searchentry_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+POSTGRES_SETUP = [
+    'CREATE INDEX properties_searchentry_vector_gin ON properties_searchentry USING gin (vector)',
+]
+
+POSTGRES_TEARDOWN = [
+    'DROP INDEX IF EXISTS properties_searchentry_vector_gin',
+]
+
+POSTGRES_REFRESH = """
+    UPDATE properties_searchentry SET vector =
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(location, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+"""
+
+
+def _execute(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def setup_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_SETUP)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_SETUP)
+
+    SearchEntry = apps.get_model('properties', 'SearchEntry')
+    sources = [
+        ('property', apps.get_model('properties', 'Property'), True),
+        ('auction', apps.get_model('properties', 'Auction'), True),
+        ('home_loan', apps.get_model('properties', 'HomeLoan'), False),
+    ]
+    for field, model, has_location in sources:
+        queryset = model.objects.select_related('location') if has_location else model.objects.all()
+        SearchEntry.objects.bulk_create(
+            [
+                SearchEntry(**{
+                    field: instance,
+                    'name': instance.name,
+                    'description': instance.description or '',
+                    'location': instance.location.name if has_location else '',
+                })
+                for instance in queryset.iterator(chunk_size=2000)
+            ],
+            batch_size=2000,
+        )
+
+    if vendor == 'postgresql':
+        schema_editor.execute(POSTGRES_REFRESH)
+
+
+def teardown_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_TEARDOWN)
+    elif vendor == 'postgresql':
+        _execute(schema_editor, POSTGRES_TEARDOWN)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0003_location_geo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, default='')),
+                ('location', models.CharField(blank=True, default='', max_length=255)),
+                ('vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+                ('auction', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='properties.auction')),
+                ('home_loan', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='properties.homeloan')),
+                ('property', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entry', to='properties.property')),
+            ],
+        ),
+        migrations.RunPython(setup_search_index, teardown_search_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_search_entry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['created_at', 'id'], name='auction_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['created_at', 'id'], name='property_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestedtour',
+            index=models.Index(fields=['created_at', 'id'], name='requestedtour_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requestedtour',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='requestedtour_user_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wishlist',
+            index=models.Index(fields=['created_at', 'id'], name='wishlist_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    Image = apps.get_model('properties', 'Image')
+    PropertySummary = apps.get_model('properties', 'PropertySummary')
+
+    covers = {}
+    for image in Image.objects.filter(is_cover=True).only('property_id', 'image_url', 'blur_hash').iterator(chunk_size=2000):
+        covers.setdefault(image.property_id, image)
+
+    batch = []
+    for instance in Property.objects.select_related('location', 'amenties').iterator(chunk_size=2000):
+        amenties = getattr(instance, 'amenties', None)
+        cover = covers.get(instance.pk)
+        batch.append(PropertySummary(
+            property_id=instance.pk,
+            name=instance.name,
+            price=instance.price,
+            currency=instance.currency,
+            discount=instance.discount,
+            type=instance.type,
+            sold_out=instance.sold_out,
+            rental=instance.rental,
+            is_store=instance.is_store,
+            bedroom=amenties.bedroom if amenties else None,
+            bathroom=amenties.bathroom if amenties else None,
+            area=amenties.area if amenties else None,
+            location_name=instance.location.name,
+            geo_lat=instance.location.geo_lat,
+            geo_lng=instance.location.geo_lng,
+            geohash=instance.location.geohash,
+            cover_image_url=cover.image_url if cover else None,
+            cover_blur_hash=cover.blur_hash if cover else None,
+            created_at=instance.created_at,
+        ))
+        if len(batch) >= 2000:
+            PropertySummary.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PropertySummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0005_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertySummary',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='properties.property')),
+                ('name', models.CharField(max_length=255)),
+                ('price', models.FloatField()),
+                ('currency', models.CharField(max_length=255)),
+                ('discount', models.FloatField(blank=True, null=True)),
+                ('type', models.CharField(blank=True, max_length=255, null=True)),
+                ('sold_out', models.BooleanField(default=False)),
+                ('rental', models.BooleanField(default=False)),
+                ('is_store', models.BooleanField(default=False)),
+                ('bedroom', models.IntegerField(blank=True, null=True)),
+                ('bathroom', models.IntegerField(blank=True, null=True)),
+                ('area', models.FloatField(blank=True, null=True)),
+                ('location_name', models.CharField(blank=True, default='', max_length=255)),
+                ('geo_lat', models.FloatField(blank=True, null=True)),
+                ('geo_lng', models.FloatField(blank=True, null=True)),
+                ('geohash', models.CharField(blank=True, max_length=12, null=True)),
+                ('cover_image_url', models.CharField(blank=True, max_length=255, null=True)),
+                ('cover_blur_hash', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['sold_out', 'rental', 'type', 'price'], name='summary_status_type_price_idx'), models.Index(fields=['price'], name='summary_price_idx'), models.Index(fields=['bedroom', 'bathroom', 'area'], name='summary_rooms_idx'), models.Index(fields=['geohash', 'geo_lat', 'geo_lng'], name='summary_geohash_idx'), models.Index(fields=['created_at', 'property'], name='summary_feed_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_bids'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auction',
+            index=models.Index(fields=['status', 'start_date', 'end_date'], name='auction_status_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-18 00:59
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0008_auction_status_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyPriceHistory',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('price', models.FloatField()),
+                ('discount', models.FloatField(blank=True, null=True)),
+                ('sold_out', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='properties.property')),
+            ],
+            options={
+                'verbose_name_plural': 'Property price history',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['property', 'created_at'], name='price_history_property_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-18 01:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    """Give every existing property a 'create' entry, so a client syncing from cursor 0 sees the whole catalogue."""
+    Property = apps.get_model('properties', 'Property')
+    PropertyChange = apps.get_model('properties', 'PropertyChange')
+
+    batch = []
+    for property_id in Property.objects.order_by('created_at', 'id').values_list('id', flat=True).iterator(chunk_size=2000):
+        batch.append(PropertyChange(property_id=property_id, action='create'))
+        if len(batch) >= 2000:
+            PropertyChange.objects.bulk_create(batch)
+            batch = []
+    PropertyChange.objects.bulk_create(batch)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_property_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('property_id', models.UUIDField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('sold_out', 'Sold out'), ('delete', 'Delete')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
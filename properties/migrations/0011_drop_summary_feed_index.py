@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-18 01:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0010_property_change'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='propertysummary',
+            name='summary_feed_idx',
+        ),
+    ]
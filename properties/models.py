@@ -1,7 +1,10 @@
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 from authentication.models import UserAccount
+from properties import geo
 
     
 class Location(models.Model):
@@ -9,12 +12,38 @@ class Location(models.Model):
     name = models.CharField(max_length=255) 
     longitude = models.DecimalField(max_digits=25, decimal_places=20)
     latitude = models.DecimalField(max_digits=25, decimal_places=20)
+    geo_lat = models.FloatField(null=True, blank=True, editable=False)
+    geo_lng = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    GEO_FIELDS = ['geo_lat', 'geo_lng', 'geohash']
+
     def __str__(self):
         return self.name
-        
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['geohash', 'geo_lat', 'geo_lng'], name='location_geohash_idx'),
+        ]
+
+    def update_geo(self):
+        if self.latitude is None or self.longitude is None:
+            self.geo_lat = self.geo_lng = self.geohash = None
+            return
+        self.geo_lat = float(self.latitude)
+        self.geo_lng = float(self.longitude)
+        self.geohash = geo.encode(self.geo_lat, self.geo_lng)
+
+    def save(self, *args, **kwargs):
+        self.update_geo()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | set(self.GEO_FIELDS)
+        super().save(*args, **kwargs)
+
+
 class Loaners(models.Model):
    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, unique=True)
    logo = models.CharField(max_length=255, null=True, blank=True) 
@@ -76,6 +105,49 @@ class Property(models.Model):
     
     class Meta:
        ordering = ['-created_at']
+       indexes = [
+           models.Index(fields=['created_at', 'id'], name='property_feed_idx'),
+       ]
+
+
+class PropertyPriceHistory(models.Model):
+    """Price, discount and sold-out state of a property after each discount or sold-out change."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, unique=True)
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='price_history')
+    price = models.FloatField()
+    discount = models.FloatField(null=True, blank=True)
+    sold_out = models.BooleanField(default=False)
+    changed_by = models.ForeignKey(UserAccount, on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Property price history"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['property', 'created_at'], name='price_history_property_idx'),
+        ]
+
+
+class PropertyChange(models.Model):
+    """
+    Append-only log of changes to properties and their nested rows, read by the change
+    feed. ``property_id`` is not a foreign key so tombstones outlive the property.
+    """
+    CREATE, UPDATE, SOLD_OUT, DELETE = 'create', 'update', 'sold_out', 'delete'
+    ACTION_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (SOLD_OUT, 'Sold out'),
+        (DELETE, 'Delete'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    property_id = models.UUIDField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
 
 
 class LoanerProperty(models.Model):
@@ -124,15 +196,25 @@ class Auction(models.Model):
     description = models.TextField()
     location = models.OneToOneField(Location, on_delete=models.CASCADE, related_name='auctions')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    # Denormalized from the highest Bid by properties.bidding, so reading it is a primary key lookup.
+    current_bid = models.FloatField(null=True, blank=True, editable=False)
+    bid_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    OPEN_STATUSES = ['PENDING', 'ACTIVE']
+    CLOSED_STATUSES = ['COMPLETED', 'CANCELLED']
+
     def __str__(self):
         return f"Auction for {self.name}"
 
     class Meta:
         verbose_name_plural = "Auctions"
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='auction_feed_idx'),
+            models.Index(fields=['status', 'start_date', 'end_date'], name='auction_status_dates_idx'),
+        ]
 
 
 class Wishlist(models.Model):
@@ -146,6 +228,9 @@ class Wishlist(models.Model):
 
     class Meta:
        ordering = ['-created_at']
+       indexes = [
+           models.Index(fields=['created_at', 'id'], name='wishlist_feed_idx'),
+       ]
 
 class Reviews(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, unique=True) 
@@ -162,6 +247,24 @@ class AuctionImage(models.Model):
     auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name='pictures')
 
 
+class Bid(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, unique=True)
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name='bids')
+    bidder = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name='bids')
+    amount = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Bid of {self.amount} on {self.auction_id}"
+
+    class Meta:
+        ordering = ['-amount']
+        indexes = [
+            models.Index(fields=['auction', '-amount'], name='bid_auction_amount_idx'),
+            models.Index(fields=['bidder', 'created_at'], name='bid_bidder_idx'),
+        ]
+
+
 class RequestedTour(models.Model):
     STATUS_CHOICES = [
         ('PENDING', 'Pending'),
@@ -182,4 +285,59 @@ class RequestedTour(models.Model):
 
     class Meta:
        ordering = ['-created_at']
+       indexes = [
+           models.Index(fields=['created_at', 'id'], name='requestedtour_feed_idx'),
+           models.Index(fields=['user', 'created_at', 'id'], name='requestedtour_user_feed_idx'),
+       ]
+
+
+class SearchEntry(models.Model):
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, related_name='search_entry', null=True, blank=True)
+    auction = models.OneToOneField(Auction, on_delete=models.CASCADE, related_name='search_entry', null=True, blank=True)
+    home_loan = models.OneToOneField(HomeLoan, on_delete=models.CASCADE, related_name='search_entry', null=True, blank=True)
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, default='')
+    location = models.CharField(max_length=255, blank=True, default='')
+    # Only populated on PostgreSQL; SQLite keeps its index in an FTS5 table instead.
+    vector = SearchVectorField(null=True, editable=False)
+
+    def __str__(self):
+        return self.name
+
 
+class PropertySummary(models.Model):
+    """
+    Flattened, one-row-per-property read model used by list and search filters, so they
+    hit a single indexed table instead of joining Amenties, Location and Image.
+    Maintained by ``properties.summary``.
+    """
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    name = models.CharField(max_length=255)
+    price = models.FloatField()
+    currency = models.CharField(max_length=255)
+    discount = models.FloatField(null=True, blank=True)
+    type = models.CharField(max_length=255, null=True, blank=True)
+    sold_out = models.BooleanField(default=False)
+    rental = models.BooleanField(default=False)
+    is_store = models.BooleanField(default=False)
+    bedroom = models.IntegerField(null=True, blank=True)
+    bathroom = models.IntegerField(null=True, blank=True)
+    area = models.FloatField(null=True, blank=True)
+    location_name = models.CharField(max_length=255, blank=True, default='')
+    geo_lat = models.FloatField(null=True, blank=True)
+    geo_lng = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)
+    cover_image_url = models.CharField(max_length=255, null=True, blank=True)
+    cover_blur_hash = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sold_out', 'rental', 'type', 'price'], name='summary_status_type_price_idx'),
+            models.Index(fields=['price'], name='summary_price_idx'),
+            models.Index(fields=['bedroom', 'bathroom', 'area'], name='summary_rooms_idx'),
+            models.Index(fields=['geohash', 'geo_lat', 'geo_lng'], name='summary_geohash_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.utils import timezone
+
+from properties import changes, response_cache, summary
+from properties.models import Property, PropertyChange, PropertyPriceHistory, PropertySummary
+
+# Columns the bulk actions may set; each is also a PropertySummary column.
+FIELDS = ('discount', 'sold_out')
+
+
+def update_listings(queryset, changed_by=None, **values):
+    """
+    Set ``values`` on every property in ``queryset`` with one UPDATE and append the new
+    state of each to ``PropertyPriceHistory``. The summary rows get the same UPDATE, the
+    change feed one entry per property, and cache versions are bumped once for the whole
+    batch. Returns the number of properties.
+    """
+    unknown = set(values) - set(FIELDS)
+    if unknown:
+        raise ValueError(f'Unsupported fields: {", ".join(sorted(unknown))}')
+
+    ids = list(queryset.values_list('pk', flat=True))
+    if not ids:
+        return 0
+
+    with transaction.atomic():
+        # Locked so the recorded prices match what the UPDATE left behind.
+        rows = list(
+            Property.objects.select_for_update().filter(pk__in=ids)
+            .order_by().values_list('pk', 'price', 'discount', 'sold_out')
+        )
+        ids = [row[0] for row in rows]
+        Property.objects.filter(pk__in=ids).update(updated_at=timezone.now(), **values)
+        if PropertySummary.objects.filter(property_id__in=ids).update(**values) < len(ids):
+            # Filtered lists join the summary table, so a property without a row would drop out of them.
+            summary.refresh(Property.objects.filter(pk__in=ids, summary__isnull=True).values_list('pk', flat=True))
+        PropertyPriceHistory.objects.bulk_create([
+            PropertyPriceHistory(
+                property_id=pk,
+                price=price,
+                discount=values.get('discount', discount),
+                sold_out=values.get('sold_out', sold_out),
+                changed_by=changed_by,
+            )
+            for pk, price, discount, sold_out in rows
+        ])
+        changes.record(PropertyChange.SOLD_OUT if values.get('sold_out') else PropertyChange.UPDATE, ids)
+
+    response_cache.bump('property', ids)
+    return len(ids)
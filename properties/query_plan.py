@@ -0,0 +1,104 @@
+from django.db.models import Prefetch
+
+
+def _split(entry):
+    if isinstance(entry, (tuple, list)):
+        return entry[0], entry[1]
+    return entry, None
+
+
+def _root(entry):
+    if isinstance(entry, Prefetch):
+        return entry.to_attr or entry.prefetch_through.split('__')[0]
+    return _split(entry)[0].split('__')[0]
+
+
+def field_roots(fields):
+    """Names and source roots of serializer ``fields``, to match against plan entries."""
+    roots = set()
+    for name, field in fields.items():
+        roots.add(name)
+        roots.add(field.source.split('.')[0])
+    return roots
+
+
+class QueryPlan:
+    """
+    The ``select_related``/``prefetch_related`` lookups a serializer needs.
+
+    Entries are either lookup strings or ``(field, SerializerClass)`` pairs. A pair pulls in
+    the nested serializer's own plan: joined onto the outer query for ``select_related``
+    entries, or as a ``Prefetch`` queryset for ``prefetch_related`` entries. Plain
+    ``Prefetch`` objects are passed through.
+
+    When ``only`` is given, top-level entries whose relation (or ``to_attr``) is not among
+    the rendered fields are skipped.
+    """
+
+    def __init__(self, select_related=(), prefetch_related=()):
+        self.select_related = list(select_related)
+        self.prefetch_related = list(prefetch_related)
+
+    def lookups(self, model, prefix='', only=None):
+        select, prefetch = [], []
+
+        for entry in self.select_related:
+            if only is not None and _root(entry) not in only:
+                continue
+            field, nested = _split(entry)
+            select.append(prefix + field)
+            if nested is not None:
+                related_model = model._meta.get_field(field).related_model
+                nested_select, nested_prefetch = nested.query_plan.lookups(related_model, f'{prefix}{field}__')
+                select += nested_select
+                prefetch += nested_prefetch
+
+        for entry in self.prefetch_related:
+            if only is not None and _root(entry) not in only:
+                continue
+            if isinstance(entry, Prefetch):
+                prefetch.append(
+                    Prefetch(prefix + entry.prefetch_through, queryset=entry.queryset, to_attr=entry.to_attr)
+                )
+                continue
+            field, nested = _split(entry)
+            if nested is None:
+                prefetch.append(prefix + field)
+            else:
+                related_model = model._meta.get_field(field).related_model
+                prefetch.append(
+                    Prefetch(prefix + field, queryset=nested.query_plan.apply(related_model._default_manager.all()))
+                )
+
+        return select, prefetch
+
+    def apply(self, queryset, only=None):
+        select, prefetch = self.lookups(queryset.model, only=only)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+def apply_query_plan(queryset, serializer_class, fields=None):
+    plan = getattr(serializer_class, 'query_plan', None)
+    if plan is None:
+        return queryset
+    return plan.apply(queryset, only=field_roots(fields) if fields is not None else None)
+
+
+class QueryPlanMixin:
+    """
+    Applies the serializer's ``query_plan`` to every queryset the view filters, so list,
+    retrieve, update and custom actions all load the same related rows up front.
+
+    ``query_budget`` maps action names to the number of queries the action may run, not
+    counting authentication; ``properties.testing.assert_query_budget`` enforces it.
+    """
+    query_budget = {}
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer()
+        return apply_query_plan(queryset, type(serializer), serializer.fields)
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+DEFAULT_TIMEOUT = 300
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def normalize_id(object_id):
+    try:
+        return str(uuid.UUID(str(object_id)))
+    except ValueError:
+        return str(object_id)
+
+
+def version_key(resource, object_id=None):
+    if object_id is None:
+        return f'resource_version:{resource}'
+    return f'resource_version:{resource}:{normalize_id(object_id)}'
+
+
+def get_version(resource, object_id=None):
+    cache = get_cache()
+    key = version_key(resource, object_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock rather than 0 so an evicted counter never re-validates old entries.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(resource, object_ids=()):
+    """
+    Invalidate the collection of ``resource`` and the given objects in it when the current
+    transaction commits, or right away outside one. Bumping before the commit would let a
+    request that still reads the old rows cache them under the new version.
+    """
+    object_ids = list(object_ids)
+    transaction.on_commit(lambda: _bump(resource, object_ids))
+
+
+def _bump(resource, object_ids):
+    cache = get_cache()
+    key = version_key(resource)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+    if object_ids:
+        # Any new value invalidates an object's entries, so a batch takes one round trip.
+        version = time.time_ns()
+        cache.set_many({version_key(resource, object_id): version for object_id in object_ids}, None)
+
+
+def request_fingerprint(request):
+    query = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    raw = json.dumps([request.path, query])
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _updated_at_values(data):
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == 'updated_at' and isinstance(value, str):
+                yield value
+            else:
+                yield from _updated_at_values(value)
+    elif isinstance(data, list):
+        for item in data:
+            yield from _updated_at_values(item)
+
+
+def last_modified(data):
+    timestamps = [parse_datetime(value) for value in _updated_at_values(data)]
+    timestamps = [value for value in timestamps if value is not None]
+    if not timestamps:
+        return None
+    return int(max(timestamps).timestamp())
+
+
+def etag(data):
+    body = json.dumps(data, cls=JSONEncoder, sort_keys=True)
+    return '"%s"' % hashlib.md5(body.encode('utf-8')).hexdigest()
+
+
+class CachedResponseMixin:
+    """
+    Caches anonymous ``list`` and ``retrieve`` responses under a key built from the
+    normalized URL and the resource's version counter, which the signals in
+    ``properties.signals`` bump on every write. Responses carry ``ETag`` and
+    ``Last-Modified`` and conditional requests are answered with 304.
+    """
+    cache_resource = None
+    cache_timeout = DEFAULT_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, None, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        object_id = normalize_id(kwargs.get(self.lookup_url_kwarg or self.lookup_field))
+        return self.cached_response(request, object_id, super().retrieve, *args, **kwargs)
+
+    def cached_response(self, request, object_id, view, *args, **kwargs):
+        # Authenticated responses carry per-user fields such as is_wishlisted.
+        if request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+
+        cache = get_cache()
+        version = get_version(self.cache_resource, object_id)
+        key = f'response:{self.cache_resource}:{object_id or "list"}:{version}:{request_fingerprint(request)}'
+        entry = cache.get(key)
+        cache_status = 'HIT'
+
+        if entry is None:
+            cache_status = 'MISS'
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = {
+                'data': response.data,
+                'etag': etag(response.data),
+                'last_modified': last_modified(response.data),
+            }
+            cache.set(key, entry, self.cache_timeout)
+
+        not_modified = get_conditional_response(
+            request,
+            etag=entry['etag'],
+            last_modified=entry['last_modified'],
+        )
+        response = not_modified or Response(entry['data'])
+        response['ETag'] = entry['etag']
+        if entry['last_modified'] is not None:
+            response['Last-Modified'] = http_date(entry['last_modified'])
+        response['X-Cache'] = cache_status
+        return response
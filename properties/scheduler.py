@@ -0,0 +1,33 @@
+from django.utils import timezone
+
+from properties import response_cache
+from properties.models import Auction
+
+BATCH_SIZE = 1000
+
+
+def _transition(queryset, status, now, batch_size):
+    """Move every auction in ``queryset`` to ``status`` in batches of set-based UPDATEs."""
+    moved = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return moved
+        # Re-applying the filter keeps a concurrent run from moving the same rows twice.
+        moved += queryset.filter(pk__in=ids).update(status=status, updated_at=now)
+        response_cache.bump('auction', ids)
+
+
+def advance_statuses(now=None, batch_size=BATCH_SIZE):
+    """
+    Complete open auctions whose end date has passed, then activate pending ones whose
+    start date has. Both steps read only the open statuses through
+    ``auction_status_dates_idx``, so historical auctions cost nothing and reruns are no-ops.
+    """
+    now = now or timezone.now()
+    due = Auction.objects.filter(status__in=Auction.OPEN_STATUSES, end_date__lte=now)
+    starting = Auction.objects.filter(status='PENDING', start_date__lte=now, end_date__gt=now)
+    return {
+        'completed': _transition(due, 'COMPLETED', now, batch_size),
+        'activated': _transition(starting, 'ACTIVE', now, batch_size),
+    }
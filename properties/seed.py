@@ -0,0 +1,444 @@
+import io
+import json
+import math
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from authentication.models import UserAccount
+from properties import fulltext, summary
+from properties.models import (
+    Amenties, Auction, AuctionImage, Bid, Criteria, HomeLoan, Image, LoanerProperty, Loaners, Location,
+    Property, PropertyChange, RequestedTour, Reviews, Wishlist,
+)
+
+CHUNK_SIZE = 5000
+PASSWORD = 'bench-password'
+# Generated accounts get ids from a per-seed block, clear of ids handed out by the sequence.
+USER_ID_BASE = 10 ** 12
+USER_IDS_PER_SEED = 10 ** 8
+HISTORY_DAYS = 730
+
+# (name, latitude, longitude, weight): listings cluster around these Addis Ababa neighbourhoods.
+NEIGHBOURHOODS = [
+    ('Bole', 8.9958, 38.7869, 20),
+    ('Kazanchis', 9.0155, 38.7636, 10),
+    ('Piassa', 9.0356, 38.7520, 8),
+    ('CMC', 9.0203, 38.8410, 12),
+    ('Sarbet', 8.9950, 38.7390, 8),
+    ('Ayat', 9.0330, 38.8750, 14),
+    ('Summit', 9.0000, 38.8500, 10),
+    ('Megenagna', 9.0200, 38.8020, 10),
+    ('Lebu', 8.9580, 38.7290, 8),
+]
+# (type, weight, median sale price in ETB, residential)
+PROPERTY_TYPES = [
+    ('Apartment', 30, 6_000_000, True),
+    ('Condominium', 20, 3_000_000, True),
+    ('Single Family', 12, 12_000_000, True),
+    ('Villa', 8, 25_000_000, True),
+    ('Townhouse', 8, 10_000_000, True),
+    ('Penthouse', 3, 30_000_000, True),
+    ('Plot Land', 6, 8_000_000, False),
+    ('Commercial', 5, 20_000_000, False),
+    ('Office Space', 5, 15_000_000, False),
+    ('Warehouse', 3, 18_000_000, False),
+]
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Let ``bulk_create`` keep the generated values of ``auto_now``/``auto_now_add`` fields."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _copy_text(value):
+    if value is None:
+        return '\\N'
+    if value is True or value is False:
+        return 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class Writer:
+    """
+    Inserts generated rows chunk by chunk: through ``COPY ... FROM STDIN`` on PostgreSQL,
+    which skips per-statement parsing and parameter binding, and ``bulk_create`` elsewhere.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, use_copy=None):
+        self.chunk_size = chunk_size
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.counts = {}
+
+    def write(self, model, objects):
+        if not objects:
+            return objects
+        if self.use_copy:
+            self.copy(model, objects)
+        else:
+            with explicit_timestamps(model):
+                model.objects.bulk_create(objects, batch_size=self.chunk_size)
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + len(objects)
+        return objects
+
+    def copy(self, model, objects):
+        fields = [
+            field for field in model._meta.concrete_fields
+            # Auto-increment keys left unset are filled in by the database.
+            if not (field.primary_key and isinstance(field, models.AutoField) and getattr(objects[0], field.attname) is None)
+        ]
+        buffer = io.StringIO()
+        for obj in objects:
+            values = []
+            for field in fields:
+                value = getattr(obj, field.attname)
+                if isinstance(field, models.JSONField):
+                    value = json.dumps(value)
+                elif value is not None:
+                    value = field.get_db_prep_save(value, connection)
+                values.append(_copy_text(value))
+            buffer.write('\t'.join(values) + '\n')
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        sql = 'COPY {} ({}) FROM STDIN'.format(
+            quote(model._meta.db_table), ', '.join(quote(field.column) for field in fields)
+        )
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, 'copy_expert'):
+                raw.copy_expert(sql, buffer)
+            else:
+                with raw.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def reset_sequences(self, *model_list):
+        statements = connection.ops.sequence_reset_sql(no_style(), model_list)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+
+
+class Seeder:
+    """
+    Builds a deterministic dataset covering every model: the same ``seed`` and ``scale``
+    always produce the same ids, names, prices, coordinates and timestamps (relative to
+    the run), so benchmark runs and query plans on different machines compare like with
+    like. ``scale`` is the number of properties; the other tables are sized from it.
+    """
+
+    def __init__(self, seed=0, chunk_size=CHUNK_SIZE, use_copy=None):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.writer = Writer(chunk_size, use_copy)
+        self.chunk_size = chunk_size
+        self.now = timezone.now()
+
+    def uuid(self):
+        return uuid.UUID(int=self.random.getrandbits(128), version=4)
+
+    def weighted(self, options, weights):
+        return self.random.choices(options, weights)[0]
+
+    def popular(self, values):
+        """Pick with a long tail: low indexes are chosen far more often."""
+        return values[int(len(values) * self.random.random() ** 3)]
+
+    def past(self, days=HISTORY_DAYS):
+        # Squaring skews towards recent dates, like a growing marketplace.
+        return self.now - timedelta(days=days * self.random.random() ** 2, seconds=self.random.randrange(86400))
+
+    def chunks(self, count):
+        for start in range(0, count, self.chunk_size):
+            yield range(start, min(start + self.chunk_size, count))
+
+    def bench_users(self):
+        agent = UserAccount.objects.create_user('Bench', 'Agent', '0900000000', 'bench-agent', PASSWORD, role='agent')
+        customer = UserAccount.objects.create_user('Bench', 'Customer', '0900000001', 'bench-customer', PASSWORD)
+        return {'agent': agent, 'customer': customer}
+
+    def users(self, count):
+        """Generated accounts share one password hash, since hashing dominates otherwise."""
+        if count > USER_IDS_PER_SEED:
+            raise ValueError(f'At most {USER_IDS_PER_SEED} users per seed')
+        password = make_password(PASSWORD)
+        first_id = USER_ID_BASE + self.seed * USER_IDS_PER_SEED
+        agents, customers = [], []
+        for chunk in self.chunks(count):
+            users, wishlists = [], []
+            for index in chunk:
+                role = self.weighted(['customer', 'agent', 'admin'], [88, 10, 2])
+                user = UserAccount(
+                    id=first_id + index,
+                    username=f'seed{self.seed}-user{index}',
+                    email=f'seed{self.seed}-user{index}@example.com',
+                    first_name=f'User{index}',
+                    last_name=f'Seed{self.seed}',
+                    phone=f'09{self.random.randrange(10 ** 8):08d}',
+                    role=role,
+                    is_staff=role == 'admin',
+                    password=password,
+                    date_joined=self.past(),
+                )
+                users.append(user)
+                # bulk_create skips the post_save signal that gives every user a wishlist.
+                wishlists.append(Wishlist(id=self.uuid(), user=user, created_at=user.date_joined, updated_at=user.date_joined))
+                (agents if role == 'agent' else customers).append(user.id)
+            self.writer.write(UserAccount, users)
+            self.writer.write(Wishlist, wishlists)
+        self.writer.reset_sequences(UserAccount)
+        return agents or customers, customers or agents
+
+    def loaners(self, count):
+        return [loaner.id for loaner in self.writer.write(Loaners, [
+            Loaners(
+                id=self.uuid(),
+                name=f'Bank {index}',
+                logo=f'https://img.example/loaners/{index}.png',
+                phone=f'011{self.random.randrange(10 ** 7):07d}',
+                real_state_provided=self.random.random() < 0.4,
+            )
+            for index in range(count)
+        ])]
+
+    def location(self, name_suffix=''):
+        name, latitude, longitude, _ = self.weighted(NEIGHBOURHOODS, [entry[3] for entry in NEIGHBOURHOODS])
+        location = Location(
+            id=self.uuid(),
+            name=f'{name}{name_suffix}',
+            latitude=round(self.random.gauss(latitude, 0.01), 6),
+            longitude=round(self.random.gauss(longitude, 0.01), 6),
+        )
+        location.update_geo()
+        location.created_at = location.updated_at = self.past()
+        return location
+
+    def properties(self, count, agents, loaners):
+        ids = []
+        for chunk in self.chunks(count):
+            locations, listings, amenties, images, links = [], [], [], [], []
+            for index in chunk:
+                kind, _, median, residential = self.weighted(PROPERTY_TYPES, [entry[1] for entry in PROPERTY_TYPES])
+                rental = self.random.random() < 0.25
+                price = median * self.random.lognormvariate(0, 0.5)
+                if rental:
+                    price /= 200
+                created_at = self.past()
+
+                location = self.location()
+                listing = Property(
+                    id=self.uuid(),
+                    name=f'{kind} {index}',
+                    description=f'{kind} in {location.name}, listing {index}',
+                    location=location,
+                    price=round(price, -3) if price >= 10_000 else round(price, -1),
+                    discount=self.random.choice([5, 10, 15, 20]) if self.random.random() < 0.15 else 0,
+                    sold_out=self.random.random() < 0.08,
+                    rental=rental,
+                    is_store=kind in ('Commercial', 'Warehouse') and self.random.random() < 0.5,
+                    type=kind,
+                    created_by_id=self.random.choice(agents),
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+                bedroom = min(8, max(1, round(self.random.gauss(3, 1.2)))) if residential else 0
+                locations.append(location)
+                listings.append(listing)
+                amenties.append(Amenties(
+                    id=self.uuid(),
+                    property=listing,
+                    bedroom=bedroom,
+                    bathroom=max(1, bedroom - self.random.randint(0, 2)) if residential else 1,
+                    area=round(max(30, self.random.gauss(35 + bedroom * 45, 25)), 1),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                pictures = 1 + min(11, int(self.random.expovariate(1 / 4)))
+                images += [
+                    Image(
+                        id=self.uuid(),
+                        property=listing,
+                        image_url=f'https://img.example/properties/{listing.id}/{picture}.jpg',
+                        is_cover=picture == 0,
+                    )
+                    for picture in range(pictures)
+                ]
+                if self.random.random() < 0.4:
+                    links.append(LoanerProperty(id=self.uuid(), property=listing, loaner_id=self.random.choice(loaners)))
+                ids.append(listing.id)
+
+            self.writer.write(Location, locations)
+            self.writer.write(Property, listings)
+            self.writer.write(Amenties, amenties)
+            self.writer.write(Image, images)
+            self.writer.write(LoanerProperty, links)
+            self.writer.write(PropertyChange, [
+                PropertyChange(property_id=listing.id, action=PropertyChange.CREATE, created_at=listing.created_at)
+                for listing in listings
+            ])
+        return ids
+
+    def auctions(self, count, bidders):
+        ids = []
+        for chunk in self.chunks(count):
+            locations, auctions, images, bids = [], [], [], []
+            for index in chunk:
+                created_at = self.past()
+                start_date = created_at + timedelta(days=self.random.uniform(0, 30))
+                end_date = start_date + timedelta(days=self.random.randint(3, 14))
+                starting_bid = round(2_000_000 * self.random.lognormvariate(0, 0.6), -3)
+                if self.random.random() < 0.05:
+                    status = 'CANCELLED'
+                elif end_date <= self.now:
+                    status = 'COMPLETED'
+                elif start_date <= self.now:
+                    status = 'ACTIVE'
+                else:
+                    status = 'PENDING'
+
+                location = self.location(name_suffix=f' lot {index}')
+                auction = Auction(
+                    id=self.uuid(),
+                    name=f'Auction {index}',
+                    description=f'Auction of a property in {location.name}',
+                    location=location,
+                    starting_bid=starting_bid,
+                    start_date=start_date,
+                    end_date=end_date,
+                    status=status,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+
+                if status != 'PENDING':
+                    # Strictly increasing amounts, as properties.bidding would have accepted them.
+                    amount, placed = starting_bid, start_date
+                    closes = min(end_date, self.now)
+                    for _ in range(int(self.random.expovariate(1 / 8))):
+                        placed += (closes - placed) * self.random.random() * 0.3
+                        bids.append(Bid(
+                            id=self.uuid(), auction=auction, bidder_id=self.random.choice(bidders),
+                            amount=amount, created_at=placed,
+                        ))
+                        auction.current_bid = amount
+                        auction.bid_count += 1
+                        amount = round(amount * self.random.uniform(1.01, 1.05), -2)
+
+                locations.append(location)
+                auctions.append(auction)
+                images += [
+                    AuctionImage(
+                        id=self.uuid(), auction=auction, is_cover=picture == 0,
+                        image_url=f'https://img.example/auctions/{auction.id}/{picture}.jpg',
+                    )
+                    for picture in range(self.random.randint(1, 4))
+                ]
+                ids.append(auction.id)
+
+            self.writer.write(Location, locations)
+            self.writer.write(Auction, auctions)
+            self.writer.write(AuctionImage, images)
+            self.writer.write(Bid, bids)
+        return ids
+
+    def home_loans(self, count, loaners):
+        loans = self.writer.write(HomeLoan, [
+            HomeLoan(
+                id=self.uuid(),
+                name=f'Home loan {index}',
+                description=f'{self.random.randint(5, 25)} year mortgage at {self.random.uniform(7, 16):.1f}%',
+                loaner_id=self.random.choice(loaners),
+            )
+            for index in range(count)
+        ])
+        self.writer.write(Criteria, [
+            Criteria(id=self.uuid(), loan=loan, description=f'Criterion {number} for {loan.name}')
+            for loan in loans for number in range(self.random.randint(1, 4))
+        ])
+
+    def wishlists(self, user_ids, property_ids, auction_ids):
+        wishlists = dict(Wishlist.objects.filter(user_id__in=user_ids).values_list('user_id', 'id'))
+        properties_through = Wishlist.property.through
+        auctions_through = Wishlist.auctions.through
+        for chunk in self.chunks(len(user_ids)):
+            property_rows, auction_rows = [], []
+            for index in chunk:
+                wishlist_id = wishlists[user_ids[index]]
+                for property_id in {self.popular(property_ids) for _ in range(int(self.random.expovariate(1 / 4)))}:
+                    property_rows.append(properties_through(wishlist_id=wishlist_id, property_id=property_id))
+                if auction_ids:
+                    for auction_id in {self.popular(auction_ids) for _ in range(int(self.random.expovariate(1 / 1)))}:
+                        auction_rows.append(auctions_through(wishlist_id=wishlist_id, auction_id=auction_id))
+            self.writer.write(properties_through, property_rows)
+            self.writer.write(auctions_through, auction_rows)
+
+    def reviews(self, property_ids, user_ids):
+        for chunk in self.chunks(len(property_ids)):
+            self.writer.write(Reviews, [
+                Reviews(
+                    id=self.uuid(),
+                    properties_id=property_ids[index],
+                    user_id=self.random.choice(user_ids),
+                    rating=self.weighted([1, 2, 3, 4, 5], [3, 5, 15, 37, 40]),
+                    review=f'Review {number} of listing {index}',
+                )
+                for index in chunk if self.random.random() < 0.3
+                for number in range(self.random.randint(1, 5))
+            ])
+
+    def tours(self, count, property_ids, user_ids):
+        for chunk in self.chunks(count):
+            tours = []
+            for _ in chunk:
+                created_at = self.past()
+                tours.append(RequestedTour(
+                    id=self.uuid(),
+                    date=created_at + timedelta(days=self.random.randint(1, 21), hours=self.random.randint(8, 17)),
+                    user_id=self.random.choice(user_ids),
+                    properties_id=self.popular(property_ids),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+            self.writer.write(RequestedTour, tours)
+
+    def run(self, scale, bench_users=True):
+        """Generate everything for ``scale`` properties; returns the bench accounts, if any."""
+        accounts = self.bench_users() if bench_users else {}
+        with transaction.atomic():
+            agents, customers = self.users(max(10, scale // 10))
+            loaners = self.loaners(max(5, math.isqrt(scale)))
+            property_ids = self.properties(scale, agents, loaners)
+            auction_ids = self.auctions(max(1, scale // 20), customers)
+            self.home_loans(max(10, scale // 100), loaners)
+            self.wishlists(customers, property_ids, auction_ids)
+            self.reviews(property_ids, customers)
+            self.tours(max(1, scale // 5), property_ids, customers)
+
+        summary.rebuild(chunk_size=self.chunk_size)
+        fulltext.rebuild()
+        return accounts
+
+
+def seed(size=1000, seed=0, chunk_size=CHUNK_SIZE, use_copy=None, bench_users=True):
+    """Seed ``size`` properties and everything around them; returns the bench accounts."""
+    return Seeder(seed, chunk_size, use_copy).run(size, bench_users=bench_users)
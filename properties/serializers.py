@@ -1,7 +1,65 @@
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
 from authentication.serializers import UserAccountSerialzer
+from properties import changes, response_cache, summary
 from properties.models import *
+from properties.query_plan import QueryPlan
+
+
+def wishlisted_ids(request, field):
+    """
+    IDs of the ``field`` ('property' or 'auctions') items on the requesting user's wishlist.
+    Loaded with one query per request and shared by every serializer rendering it.
+    """
+    if request is None or not request.user.is_authenticated:
+        return frozenset()
+
+    cache = request.__dict__.setdefault('_wishlisted_ids', {})
+    if field not in cache:
+        m2m = Wishlist._meta.get_field(field)
+        cache[field] = frozenset(
+            m2m.remote_field.through.objects.filter(
+                wishlist__user_id=request.user.pk
+            ).values_list(m2m.m2m_reverse_name(), flat=True)
+        )
+    return cache[field]
+
+
+def _csv(value):
+    return {item.strip() for item in (value or '').split(',') if item.strip()}
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets for read-only use of the top-level serializer: ``?fields=a,b`` keeps
+    only those fields and ``?expand=x,y`` adds entries from ``Meta.expandable_fields``,
+    a mapping of field name to ``(SerializerClass, kwargs)``.
+    """
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or hasattr(self.root, 'initial_data') or not self._is_root():
+            return fields
+
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        expand = _csv(request.query_params.get('expand')) & set(expandable)
+        for name in expand:
+            serializer_class, kwargs = expandable[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        only = _csv(request.query_params.get('fields'))
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only or name in expand}
+        return fields
 
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -20,24 +78,29 @@ class CriteriaSerializer(serializers.ModelSerializer):
         fields='__all__'
 
 class ImageSerializer(serializers.ModelSerializer):
-    property = serializers.UUIDField(read_only=True)
+    property = serializers.UUIDField(source='property_id', read_only=True)
     class Meta:
         model = Image
         fields = '__all__'
 
 class AmentiesSerializer(serializers.ModelSerializer):
-    property = serializers.UUIDField(read_only=True)
+    property = serializers.UUIDField(source='property_id', read_only=True)
 
     class Meta:
         model = Amenties
         fields = '__all__'
 
-class AuctionSerializer(serializers.ModelSerializer):
+class AuctionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     start_date = serializers.SerializerMethodField()
     location = LocationSerializer()
     pictures = ImageSerializer(many=True)
     is_wishlisted = serializers.SerializerMethodField()
 
+    query_plan = QueryPlan(
+        select_related=['location'],
+        prefetch_related=['pictures'],
+    )
+
     class Meta:
         model = Auction
         fields = '__all__'
@@ -45,13 +108,7 @@ class AuctionSerializer(serializers.ModelSerializer):
     def get_is_wishlisted(self, obj):
         if hasattr(obj, 'is_wishlisted'):
             return obj.is_wishlisted
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Wishlist.objects.filter(
-                user=request.user,
-                auctions=obj 
-            ).exists()
-        return False
+        return obj.pk in wishlisted_ids(self.context.get('request'), 'auctions')
 
     def get_start_date(self, obj):
         return obj.start_date.strftime("%Y-%m-%d")
@@ -83,116 +140,302 @@ class AuctionSerializer(serializers.ModelSerializer):
 
         return instance
     
+class BidSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Bid
+        fields = ['id', 'auction', 'bidder', 'amount', 'created_at']
+        read_only_fields = ['auction', 'bidder']
+
 class LoanerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Loaners
         fields = ['id', 'name', 'real_state_provided', 'logo', 'phone']
 
+def resolve_loaners(loaners_data):
+    """
+    Map each loaner name in ``loaners_data`` to a ``Loaners`` row: existing ones are found
+    with one ``IN`` lookup and the missing ones inserted with one ``bulk_create``.
+    """
+    names = {loaner['name'] for loaner in loaners_data}
+    if not names:
+        return {}
+    loaners = {loaner.name: loaner for loaner in Loaners.objects.filter(name__in=names)}
+    missing = {}
+    for loaner in loaners_data:
+        if loaner['name'] not in loaners and loaner['name'] not in missing:
+            missing[loaner['name']] = Loaners(**loaner)
+    Loaners.objects.bulk_create(missing.values())
+    loaners.update(missing)
+    return loaners
+
+
+def prefetch_planned(instance, query_plan, names):
+    """Prefetch the ``names`` relations of ``instance`` as ``query_plan`` loads them, one query each."""
+    _, prefetch = query_plan.lookups(type(instance), only=set(names))
+    prefetch_related_objects([instance], *prefetch)
+
+
+def assign_changed(instance, data):
+    """Set the values in ``data`` that differ from ``instance``; returns the changed field names."""
+    changed = []
+    for name, value in data.items():
+        field = instance._meta.get_field(name)
+        if field.is_relation:
+            current, value_id = getattr(instance, field.attname), getattr(value, 'pk', value)
+            if current == value_id:
+                continue
+        elif getattr(instance, name) == value:
+            continue
+        setattr(instance, name, value)
+        changed.append(name)
+    return changed
+
+
+def save_changed(instance, data):
+    """Save only the fields of ``instance`` that ``data`` changes, if any; returns their names."""
+    changed = assign_changed(instance, data)
+    if changed:
+        auto_now = [field.name for field in instance._meta.concrete_fields if getattr(field, 'auto_now', False)]
+        instance.save(update_fields=changed + auto_now)
+    return changed
+
+
 class LoanerPropertySerializer(serializers.ModelSerializer):
     loaner = LoanerSerializer() 
+
+    query_plan = QueryPlan(select_related=['loaner'])
     
     class Meta:
         model = LoanerProperty
         fields = ['id', 'loaner', 'description']
 
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     location = LocationSerializer()
     pictures = ImageSerializer(many=True)
     amenties = AmentiesSerializer()
+    loaners = LoanerSerializer(many=True, required=False, write_only=True)
     loaner_detail = LoanerPropertySerializer(source='loaners', many=True, read_only=True)
-    
+    distance_km = serializers.FloatField(read_only=True)
+    is_wishlisted = serializers.SerializerMethodField()
+
+    query_plan = QueryPlan(
+        select_related=['location', 'amenties'],
+        prefetch_related=['pictures', ('loaners', LoanerPropertySerializer)],
+    )
     
     class Meta:
         model = Property
         fields = '__all__'
 
     def create(self, validated_data):
+        """
+        Create the property with its location, amenities, images and loaner links in one
+        transaction. Images and links are inserted in bulk, then prefetched back for the
+        response with one query each.
+        """
         location_data = validated_data.pop('location')
         amenties_data = validated_data.pop('amenties')
         image_data = validated_data.pop('pictures')
         loaners_data = validated_data.pop('loaners', [])
-        
-        location = Location.objects.create(**location_data)
-        
-
-        property = Property.objects.create(location=location, **validated_data)
-        
-
-        amenties_data['property'] = property
-        Amenties.objects.create(**amenties_data)
-
-
-        for image in image_data:
-            image['property'] = property
-            Image.objects.create(**image)
-        
-
-        for loaner_data in loaners_data:
-            loaner, _ = Loaners.objects.get_or_create(
-                name=loaner_data['name'],
-                defaults={
-                    'logo': loaner_data.get('logo', ''),
-                    'real_state_provided': loaner_data.get('real_state_provided', False)
-                }
-            )
-            property.loaners.add(loaner)
-        
+
+        with transaction.atomic(), summary.deferred(), changes.deferred():
+            location = Location.objects.create(**location_data)
+            property = Property.objects.create(location=location, **validated_data)
+            Amenties.objects.create(property=property, **amenties_data)
+
+            Image.objects.bulk_create([Image(property=property, **image) for image in image_data])
+            loaners = resolve_loaners(loaners_data)
+            LoanerProperty.objects.bulk_create([
+                LoanerProperty(property=property, loaner=loaners[loaner['name']]) for loaner in loaners_data
+            ])
+            # bulk_create skips the signals that refresh the summary row and the cached responses.
+            summary.schedule([property.pk])
+
+        response_cache.bump('property', [property.pk])
+        prefetch_planned(property, self.query_plan, ['pictures', 'loaners'])
+        property.is_wishlisted = False
         return property
 
     def update(self, instance, validated_data):
-        if 'location' in validated_data:
-            location_data = validated_data.pop('location')
-            location = instance.location
-            for attr, value in location_data.items():
-                setattr(location, attr, value)
-                location.save()
-        if 'pictures' in validated_data:
-            pictures_data = validated_data.pop('pictures')
-            instance.pictures.all().delete()
-            for picture_data in pictures_data:
-                Image.objects.create(property=instance, **picture_data)
-        if 'amenties' in validated_data:
-            amenities_data = validated_data.pop('amenties')
-            amenities = instance.location
-            for attr, value in amenities_data.items():
-                setattr(location, attr, value)
-                amenities.save()
-        if 'loaners' in validated_data:
-            loaners_data = validated_data.pop('loaners')
-            instance.loaners.clear()
-            for loaner_data in loaners_data:
-                loaner, _ = Loaners.objects.get_or_create(
-                    name=loaner_data['name'],
-                    defaults={
-                        'logo': loaner_data.get('logo', ''),
-                        'real_state_provided': loaner_data.get('real_state_provided', False)
-                    }
-                )
-                instance.loaners.add(loaner)
-            print("______________VAIDATED DATA______________________")
-            print(validated_data, "____________________________________")
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-            instance.save()
-        
+        """
+        Apply only what differs from the current rows, in one transaction: changed columns
+        are saved with ``update_fields``, and pictures (matched by URL) and loaner links are
+        diffed into bulk inserts, updates and deletes. Related rows come from the view's
+        query plan, so an unchanged nested payload costs no queries; a relation that was
+        written to is prefetched again for the response.
+        """
+        location_data = validated_data.pop('location', None)
+        amenties_data = validated_data.pop('amenties', None)
+        pictures_data = validated_data.pop('pictures', None)
+        loaners_data = validated_data.pop('loaners', None)
+
+        with transaction.atomic(), summary.deferred(), changes.deferred():
+            if location_data is not None:
+                save_changed(instance.location, location_data)
+            if amenties_data is not None:
+                try:
+                    save_changed(instance.amenties, amenties_data)
+                except Property.amenties.RelatedObjectDoesNotExist:
+                    Amenties.objects.create(property=instance, **amenties_data)
+
+            related_changed = []
+            if pictures_data is not None and self.sync_pictures(instance, pictures_data):
+                related_changed.append('pictures')
+            if loaners_data is not None and self.sync_loaners(instance, loaners_data):
+                related_changed.append('loaners')
+            if related_changed:
+                # Bulk writes skip the signals that refresh the summary row and the change log.
+                summary.schedule([instance.pk])
+                changes.record(PropertyChange.UPDATE, [instance.pk])
+
+            save_changed(instance, validated_data)
+
+        if related_changed:
+            # Nor do they bump the cached responses; done after the commit, as in create().
+            response_cache.bump('property', [instance.pk])
+            # Drops the rows the view prefetched before the writes.
+            instance.refresh_from_db(fields=related_changed)
+            prefetch_planned(instance, self.query_plan, related_changed)
         return instance
-    
+
+    def sync_pictures(self, instance, pictures_data):
+        current = {}
+        for image in instance.pictures.all():
+            current.setdefault(image.image_url, []).append(image)
+
+        created, updated = [], []
+        for picture in pictures_data:
+            matches = current.get(picture['image_url'])
+            if matches:
+                image = matches.pop(0)
+                if assign_changed(image, picture):
+                    updated.append(image)
+            else:
+                created.append(Image(property=instance, **picture))
+        removed = [image.pk for images in current.values() for image in images]
+
+        if removed:
+            Image.objects.filter(pk__in=removed).delete()
+        if updated:
+            Image.objects.bulk_update(updated, ['is_cover', 'blur_hash'])
+        if created:
+            Image.objects.bulk_create(created)
+        return bool(created or updated or removed)
+
+    def sync_loaners(self, instance, loaners_data):
+        loaners = resolve_loaners(loaners_data)
+        wanted = {loaners[loaner['name']].pk: loaners[loaner['name']] for loaner in loaners_data}
+        current = {link.loaner_id: link for link in instance.loaners.all()}
+
+        removed = [link.pk for loaner_id, link in current.items() if loaner_id not in wanted]
+        created = [
+            LoanerProperty(property=instance, loaner=loaner)
+            for loaner_id, loaner in wanted.items() if loaner_id not in current
+        ]
+        if removed:
+            LoanerProperty.objects.filter(pk__in=removed).delete()
+        if created:
+            LoanerProperty.objects.bulk_create(created)
+        return bool(created or removed)
+
     def get_is_wishlisted(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return Wishlist.objects.filter(
-                user=request.user,
-                property=obj
-            ).exists()
-        return False
+        if hasattr(obj, 'is_wishlisted'):
+            return obj.is_wishlisted
+        return obj.pk in wishlisted_ids(self.context.get('request'), 'property')
 
     
 
+class PropertyImportSerializer(serializers.ModelSerializer):
+    """Validates one row of a bulk import; ``properties.importer`` does the writes."""
+    location = LocationSerializer()
+    amenties = AmentiesSerializer()
+    pictures = ImageSerializer(many=True, required=False)
+    loaners = LoanerSerializer(many=True, required=False)
+
+    class Meta:
+        model = Property
+        exclude = ['created_by']
+
+
+class PropertySelectionSerializer(serializers.Serializer):
+    """Picks the properties of a bulk action: an ``ids`` list, or a ``filter`` in the search body format."""
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filter = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Pass either 'ids' or 'filter'.")
+        return attrs
+
+
+class BulkDiscountSerializer(PropertySelectionSerializer):
+    discount = serializers.FloatField(min_value=0, max_value=100)
+
+
+class DiscountSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    discount = serializers.FloatField(min_value=0, max_value=100)
+
+
+class BulkSoldOutSerializer(PropertySelectionSerializer):
+    sold_out = serializers.BooleanField()
+
+
+class CoverImageField(serializers.Field):
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, summary):
+        if not summary.cover_image_url:
+            return None
+        return {'image_url': summary.cover_image_url, 'blur_hash': summary.cover_blur_hash}
+
+
+class PropertyCardSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Compact representation for list and search results, read from ``PropertySummary``."""
+    location_name = serializers.CharField(source='summary.location_name', read_only=True)
+    bedroom = serializers.IntegerField(source='summary.bedroom', read_only=True)
+    bathroom = serializers.IntegerField(source='summary.bathroom', read_only=True)
+    area = serializers.FloatField(source='summary.area', read_only=True)
+    cover_image = CoverImageField(source='summary')
+    is_wishlisted = serializers.SerializerMethodField()
+    distance_km = serializers.FloatField(read_only=True)
+
+    query_plan = QueryPlan(
+        select_related=['summary', 'location', 'amenties'],
+        prefetch_related=['pictures', ('loaners', LoanerPropertySerializer)],
+    )
+
+    class Meta:
+        model = Property
+        fields = [
+            'id', 'name', 'price', 'currency', 'discount', 'type', 'sold_out', 'rental', 'is_store',
+            'location_name', 'bedroom', 'bathroom', 'area', 'cover_image', 'is_wishlisted',
+            'distance_km', 'created_at',
+        ]
+        expandable_fields = {
+            'location': (LocationSerializer, {}),
+            'amenties': (AmentiesSerializer, {}),
+            'pictures': (ImageSerializer, {'many': True}),
+            'loaner_detail': (LoanerPropertySerializer, {'source': 'loaners', 'many': True}),
+        }
+
+    def get_is_wishlisted(self, obj):
+        if hasattr(obj, 'is_wishlisted'):
+            return obj.is_wishlisted
+        return obj.pk in wishlisted_ids(self.context.get('request'), 'property')
+
+
 class WishListSerializer(serializers.ModelSerializer):
     property = PropertySerializer(many=True) 
     auctions = AuctionSerializer(many=True)
 
+    query_plan = QueryPlan(
+        prefetch_related=[('property', PropertySerializer), ('auctions', AuctionSerializer)],
+    )
+
     class Meta:
         model = Wishlist
         fields = '__all__'
@@ -204,11 +447,16 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class HomeLoanSerializer(serializers.ModelSerializer):
+class HomeLoanSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 
     loaner = LoanerSerializer()
     criteria = CriteriaSerializer(many=True)
 
+    query_plan = QueryPlan(
+        select_related=['loaner'],
+        prefetch_related=['criteria'],
+    )
+
     class Meta:
         model = HomeLoan
         fields = '__all__'
@@ -228,6 +476,10 @@ class HomeLoanSerializer(serializers.ModelSerializer):
 class RequestTourSerializer(serializers.ModelSerializer):
     user = UserAccountSerialzer(read_only=True)
     properties = PropertySerializer()
+
+    query_plan = QueryPlan(
+        select_related=['user', ('properties', PropertySerializer)],
+    )
     class Meta:
         model = RequestedTour
         fields = '__all__'
@@ -0,0 +1,145 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_delete, post_save
+
+from properties import changes, fulltext, response_cache, summary
+from properties.models import (
+    Amenties, Auction, AuctionImage, Criteria, HomeLoan, Image, LoanerProperty, Loaners, Location, Property,
+    PropertyChange,
+)
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=Auction)
+@receiver(post_save, sender=HomeLoan)
+def update_search_entry(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or update_fields & fulltext.DOCUMENT_FIELDS:
+        fulltext.index(instance)
+
+
+@receiver(post_save, sender=Location)
+def update_search_entry_location(sender, instance, created, update_fields=None, **kwargs):
+    if not created and (update_fields is None or 'name' in update_fields):
+        fulltext.reindex_location(instance)
+
+
+def _deleted_with_property(origin):
+    # Rows removed by a Property or Location cascade must not resurrect the summary row.
+    model = origin if isinstance(origin, type) else getattr(origin, 'model', type(origin))
+    return model in (Property, Location)
+
+
+@receiver(post_save, sender=Property)
+def update_summary(sender, instance, created, update_fields=None, **kwargs):
+    if created or update_fields is None or update_fields & set(summary.SUMMARY_FIELDS):
+        summary.schedule([instance.pk])
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=Amenties)
+def update_summary_from_related(sender, instance, **kwargs):
+    summary.schedule([instance.property_id])
+
+
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=Amenties)
+def update_summary_after_delete(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_property(origin):
+        summary.schedule([instance.property_id])
+
+
+@receiver(post_save, sender=Location)
+def update_summary_location(sender, instance, created, **kwargs):
+    if not created:
+        summary.schedule(Property.objects.filter(location_id=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Property)
+def log_property_change(sender, instance, created, **kwargs):
+    changes.record(PropertyChange.CREATE if created else PropertyChange.UPDATE, [instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def log_property_delete(sender, instance, **kwargs):
+    changes.record(PropertyChange.DELETE, [instance.pk])
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_save, sender=Amenties)
+@receiver(post_save, sender=LoanerProperty)
+def log_nested_change(sender, instance, **kwargs):
+    if instance.property_id:
+        changes.record(PropertyChange.UPDATE, [instance.property_id])
+
+
+@receiver(post_delete, sender=Image)
+@receiver(post_delete, sender=Amenties)
+@receiver(post_delete, sender=LoanerProperty)
+def log_nested_delete(sender, instance, origin=None, **kwargs):
+    if instance.property_id and not _deleted_with_property(origin):
+        changes.record(PropertyChange.UPDATE, [instance.property_id])
+
+
+@receiver(post_save, sender=Location)
+def log_location_change(sender, instance, created, **kwargs):
+    if not created:
+        changes.record(PropertyChange.UPDATE, Property.objects.filter(location_id=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def invalidate_property(sender, instance, **kwargs):
+    response_cache.bump('property', [instance.pk])
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+@receiver(post_save, sender=Amenties)
+@receiver(post_delete, sender=Amenties)
+@receiver(post_save, sender=LoanerProperty)
+@receiver(post_delete, sender=LoanerProperty)
+def invalidate_property_detail(sender, instance, **kwargs):
+    response_cache.bump('property', [instance.property_id] if instance.property_id else [])
+
+
+@receiver(post_save, sender=Auction)
+@receiver(post_delete, sender=Auction)
+def invalidate_auction(sender, instance, **kwargs):
+    response_cache.bump('auction', [instance.pk])
+
+
+@receiver(post_save, sender=AuctionImage)
+@receiver(post_delete, sender=AuctionImage)
+def invalidate_auction_detail(sender, instance, **kwargs):
+    response_cache.bump('auction', [instance.auction_id])
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    response_cache.bump('property', Property.objects.filter(location_id=instance.pk).values_list('pk', flat=True))
+    response_cache.bump('auction', Auction.objects.filter(location_id=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=HomeLoan)
+@receiver(post_delete, sender=HomeLoan)
+def invalidate_home_loan(sender, instance, **kwargs):
+    response_cache.bump('home_loan', [instance.pk])
+
+
+@receiver(post_save, sender=Criteria)
+@receiver(post_delete, sender=Criteria)
+def invalidate_home_loan_detail(sender, instance, **kwargs):
+    response_cache.bump('home_loan', [instance.loan_id] if instance.loan_id else [])
+
+
+@receiver(post_save, sender=Loaners)
+@receiver(post_delete, sender=Loaners)
+def invalidate_loaner(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    response_cache.bump('home_loan', HomeLoan.objects.filter(loaner_id=instance.pk).values_list('pk', flat=True))
+    response_cache.bump('property', LoanerProperty.objects.filter(
+        loaner_id=instance.pk, property__isnull=False
+    ).values_list('property_id', flat=True))
@@ -0,0 +1,92 @@
+"""
+Full-catalogue snapshots as gzip-compressed NDJSON.
+
+The first line is a header, ``{"snapshot": {"generation": ..., "created_at": ...}}``, then
+one property per line, then a trailer, ``{"end": {"generation": ..., "count": ...}}``,
+whose absence means the file is truncated. The generation is a change feed cursor:
+consumers load the snapshot, then follow ``/properties/changes/?since=<generation>``.
+"""
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from properties import changes, streaming
+from properties.models import Image, LoanerProperty, Property
+
+CHUNK_SIZE = 500
+
+
+def source_queryset(include_sold_out=False):
+    queryset = Property.objects.select_related('location', 'amenties').prefetch_related(
+        Prefetch('pictures', queryset=Image.objects.filter(is_cover=True), to_attr='covers'),
+        Prefetch('loaners', queryset=LoanerProperty.objects.select_related('loaner')),
+    )
+    if not include_sold_out:
+        queryset = queryset.filter(sold_out=False)
+    return queryset
+
+
+def record(instance):
+    location = instance.location
+    try:
+        amenties = instance.amenties
+    except Property.amenties.RelatedObjectDoesNotExist:
+        amenties = None
+    cover = instance.covers[0] if instance.covers else None
+
+    return {
+        'id': instance.id,
+        'name': instance.name,
+        'description': instance.description,
+        'price': instance.price,
+        'currency': instance.currency,
+        'discount': instance.discount,
+        'type': instance.type,
+        'sold_out': instance.sold_out,
+        'rental': instance.rental,
+        'is_store': instance.is_store,
+        'move_in_date': instance.move_in_date,
+        'created_by': instance.created_by_id,
+        'created_at': instance.created_at,
+        'updated_at': instance.updated_at,
+        'location': {
+            'id': location.id,
+            'name': location.name,
+            'latitude': location.latitude,
+            'longitude': location.longitude,
+        },
+        'amenties': {
+            'bedroom': amenties.bedroom,
+            'bathroom': amenties.bathroom,
+            'area': amenties.area,
+        } if amenties else None,
+        'cover_image': {'image_url': cover.image_url, 'blur_hash': cover.blur_hash} if cover else None,
+        'loaners': [
+            {
+                'id': link.loaner.id,
+                'name': link.loaner.name,
+                'logo': link.loaner.logo,
+                'phone': link.loaner.phone,
+                'real_state_provided': link.loaner.real_state_provided,
+            }
+            for link in instance.loaners.all()
+        ],
+    }
+
+
+def lines(generation, include_sold_out=False, chunk_size=CHUNK_SIZE):
+    """NDJSON text, one chunk of properties at a time."""
+    yield streaming.dumps({'snapshot': {'generation': generation, 'created_at': timezone.now()}}) + '\n'
+    count = 0
+    for chunk in streaming.iter_keyset_chunks(source_queryset(include_sold_out).order_by('pk'), chunk_size):
+        count += len(chunk)
+        yield ''.join(streaming.dumps(record(instance)) + '\n' for instance in chunk)
+    yield streaming.dumps({'end': {'generation': generation, 'count': count}}) + '\n'
+
+
+def export(include_sold_out=False, chunk_size=CHUNK_SIZE):
+    """
+    Return ``(generation, chunks)``: the snapshot's generation, taken before any property
+    is read, and an iterator of gzip-compressed bytes.
+    """
+    generation = changes.current_cursor()
+    return generation, streaming.gzip_chunks(lines(generation, include_sold_out, chunk_size))
@@ -0,0 +1,116 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Prefetch
+
+from properties import streaming
+from properties.models import Image, Property, PropertySummary
+
+SUMMARY_FIELDS = [
+    'name', 'price', 'currency', 'discount', 'type', 'sold_out', 'rental', 'is_store',
+    'bedroom', 'bathroom', 'area', 'location_name', 'geo_lat', 'geo_lng', 'geohash',
+    'cover_image_url', 'cover_blur_hash', 'created_at',
+]
+
+_state = threading.local()
+
+
+def source_queryset():
+    return Property.objects.select_related('location', 'amenties').prefetch_related(
+        Prefetch('pictures', queryset=Image.objects.filter(is_cover=True), to_attr='covers')
+    )
+
+
+def build(instance):
+    try:
+        amenties = instance.amenties
+    except Property.amenties.RelatedObjectDoesNotExist:
+        amenties = None
+    location = instance.location
+    covers = getattr(instance, 'covers', None)
+    if covers is None:
+        covers = list(instance.pictures.filter(is_cover=True)[:1])
+    cover = covers[0] if covers else None
+
+    return PropertySummary(
+        property=instance,
+        name=instance.name,
+        price=instance.price,
+        currency=instance.currency,
+        discount=instance.discount,
+        type=instance.type,
+        sold_out=instance.sold_out,
+        rental=instance.rental,
+        is_store=instance.is_store,
+        bedroom=amenties.bedroom if amenties else None,
+        bathroom=amenties.bathroom if amenties else None,
+        area=amenties.area if amenties else None,
+        location_name=location.name,
+        geo_lat=location.geo_lat,
+        geo_lng=location.geo_lng,
+        geohash=location.geohash,
+        cover_image_url=cover.image_url if cover else None,
+        cover_blur_hash=cover.blur_hash if cover else None,
+        created_at=instance.created_at,
+    )
+
+
+def write(instances):
+    PropertySummary.objects.bulk_create(
+        [build(instance) for instance in instances],
+        update_conflicts=True,
+        unique_fields=['property'],
+        update_fields=SUMMARY_FIELDS,
+    )
+
+
+def refresh(property_ids):
+    """Rebuild the summary rows of ``property_ids`` from their source rows."""
+    property_ids = set(property_ids)
+    if property_ids:
+        write(source_queryset().filter(pk__in=property_ids))
+
+
+def fill_missing(chunk_size=2000):
+    """Create the rows of properties that have none, ``chunk_size`` at a time; returns how many."""
+    count = 0
+    while True:
+        ids = list(Property.objects.filter(summary__isnull=True).order_by().values_list('pk', flat=True)[:chunk_size])
+        refresh(ids)
+        count += len(ids)
+        if len(ids) < chunk_size:
+            return count
+
+
+def schedule(property_ids):
+    """Refresh now, or at the end of the enclosing ``deferred()`` block."""
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        refresh(property_ids)
+    else:
+        pending.update(property_ids)
+
+
+@contextmanager
+def deferred():
+    """Collect refreshes made inside the block and apply them once on exit."""
+    if getattr(_state, 'pending', None) is not None:
+        yield
+        return
+
+    _state.pending = set()
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    refresh(pending)
+
+
+def rebuild(chunk_size=2000):
+    with transaction.atomic():
+        PropertySummary.objects.all().delete()
+        for chunk in streaming.iter_keyset_chunks(source_queryset().order_by('pk'), chunk_size):
+            write(chunk)
+    return PropertySummary.objects.count()
@@ -0,0 +1,85 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import DatabaseError, connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from properties import bidding
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(budget, using='default'):
+    """Fail if the block runs more than ``budget`` queries."""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+
+    executed = len(context.captured_queries)
+    if executed > budget:
+        queries = '\n'.join(
+            f'{index}. {query["sql"]}' for index, query in enumerate(context.captured_queries, start=1)
+        )
+        raise QueryBudgetExceeded(f'{executed} queries executed, budget is {budget}:\n{queries}')
+
+
+def assert_query_budget(viewset, action, using='default'):
+    """Fail if the block runs more queries than ``viewset.query_budget[action]``."""
+    return query_budget(viewset.query_budget[action], using)
+
+
+def concurrent_bids(auction_id, bidders, amounts, workers=16):
+    """
+    Place ``amounts`` on one auction from ``workers`` threads, each on its own database
+    connection, cycling through ``bidders``. Returns the accepted bids, the rejected
+    amounts, any database errors and the per-bid latencies in seconds.
+    """
+    results = {'accepted': [], 'rejected': [], 'errors': [], 'latencies': []}
+    lock = threading.Lock()
+    queue = list(enumerate(amounts))
+
+    def work():
+        try:
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    index, amount = queue.pop()
+                started = time.perf_counter()
+                try:
+                    outcome = 'accepted', bidding.place_bid(auction_id, bidders[index % len(bidders)], amount)
+                except bidding.BidRejected:
+                    outcome = 'rejected', amount
+                except DatabaseError as exc:
+                    outcome = 'errors', exc
+                with lock:
+                    results[outcome[0]].append(outcome[1])
+                    results['latencies'].append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def check_bids(auction, amounts, accepted):
+    """Fail unless the auction's high bid and counters agree with the bids that were accepted."""
+    auction.refresh_from_db(fields=['current_bid', 'bid_count'])
+    highest = bidding.highest_bid(auction.pk)
+    problems = []
+    if auction.current_bid != max(amounts):
+        problems.append(f'current_bid is {auction.current_bid}, the highest offer was {max(amounts)}')
+    if highest is None or highest.amount != auction.current_bid:
+        problems.append(f'highest Bid row is {highest and highest.amount}, current_bid is {auction.current_bid}')
+    recorded = auction.bids.count()
+    if not auction.bid_count == recorded == len(accepted):
+        problems.append(f'bid_count {auction.bid_count}, {recorded} Bid rows, {len(accepted)} accepted')
+    if problems:
+        raise AssertionError('Lost bids: ' + '; '.join(problems))
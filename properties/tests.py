@@ -1,3 +1,1137 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import os
+import random
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock, skipIf
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import metrics
+from authentication.models import UserAccount
+from properties import benchmark, bidding, events, fulltext, geo, importer, pricing, response_cache, scheduler, seed, snapshot, streaming, summary
+from properties.models import *
+from properties.testing import QueryBudgetExceeded, assert_query_budget, check_bids, concurrent_bids, query_budget
+from properties.views import *
+
+
+def create_listing(index, loaner=None, pictures=3):
+    location = Location.objects.create(name=f'Location {index}', latitude=9.0, longitude=38.7)
+    listing = Property.objects.create(
+        name=f'Property {index}',
+        description='Listing',
+        location=location,
+        price=1000 + index,
+        type='Apartment',
+    )
+    Amenties.objects.create(property=listing, bedroom=2, bathroom=1, area=80)
+    for picture in range(pictures):
+        Image.objects.create(property=listing, image_url=f'https://img/{index}/{picture}', is_cover=picture == 0)
+    if loaner is not None:
+        LoanerProperty.objects.create(property=listing, loaner=loaner)
+    return listing
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        loaner = Loaners.objects.create(name='Bank')
+        cls.properties = [create_listing(index, loaner) for index in range(100)]
+
+        for index in range(20):
+            location = Location.objects.create(name=f'Auction {index}', latitude=9.0, longitude=38.7)
+            auction = Auction.objects.create(
+                name=f'Auction {index}',
+                description='Auction',
+                location=location,
+                starting_bid=100,
+                start_date=timezone.now(),
+                end_date=timezone.now(),
+            )
+            AuctionImage.objects.create(auction=auction, image_url=f'https://img/a/{index}')
+            loan = HomeLoan.objects.create(name=f'Loan {index}', description='Loan', loaner=loaner)
+            Criteria.objects.create(description='Criteria', loan=loan)
+            RequestedTour.objects.create(date=timezone.now(), user=cls.agent, properties=cls.properties[index])
+            if index % 2 == 0:
+                cls.agent.wishlist.auctions.add(auction)
+
+        cls.agent.wishlist.property.add(*cls.properties[:10])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_property_list(self):
+        with assert_query_budget(PropertyViewSet, 'list'):
+            response = self.client.get('/properties/?limit=100')
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_property_list_authenticated(self):
+        self.client.force_authenticate(self.agent)
+        with assert_query_budget(PropertyViewSet, 'list'):
+            response = self.client.get('/properties/?limit=100')
+        wishlisted = {item['id'] for item in response.data['results'] if item['is_wishlisted']}
+        self.assertEqual(wishlisted, {str(listing.id) for listing in self.properties[:10]})
+
+    def test_property_retrieve(self):
+        with assert_query_budget(PropertyViewSet, 'retrieve'):
+            response = self.client.get(f'/properties/{self.properties[0].id}/')
+        self.assertEqual(len(response.data['pictures']), 3)
+
+    def test_property_search(self):
+        self.client.force_authenticate(self.agent)
+        with assert_query_budget(PropertyViewSet, 'search'):
+            response = self.client.post('/properties/search/?limit=100', {'type': 'Apartment'}, format='json')
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_auction_list(self):
+        with assert_query_budget(AuctionViewSet, 'list'):
+            response = self.client.get('/auctions/?limit=100')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_auction_list_authenticated(self):
+        self.client.force_authenticate(self.agent)
+        with assert_query_budget(AuctionViewSet, 'list'):
+            response = self.client.get('/auctions/?limit=100')
+        self.assertEqual(sum(item['is_wishlisted'] for item in response.data['results']), 10)
+
+    def test_wishlist_list(self):
+        self.client.force_authenticate(self.agent)
+        with assert_query_budget(WishlistViewSet, 'list'):
+            response = self.client.get('/wishlist/')
+        wishlist = response.data['results'][0]
+        self.assertEqual(len(wishlist['property']), 10)
+        self.assertTrue(all(item['is_wishlisted'] for item in wishlist['auctions']))
+
+    def test_home_loan_list(self):
+        with assert_query_budget(HomeLoanViewSet, 'list'):
+            response = self.client.get('/home-loan/?limit=100')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_tour_list(self):
+        self.client.force_authenticate(self.agent)
+        with assert_query_budget(RequestTourViewset, 'list'):
+            response = self.client.get('/tour/?limit=100')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_budget_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(1):
+                [listing.location.name for listing in Property.objects.all()[:5]]
+
+
+class GeoSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Due north of (9.0, 38.7): about 0, 1.1, 5.6 and 55.6 km away.
+        cls.listings = []
+        for index, offset in enumerate((0.5, 0.0, 0.05, 0.01)):
+            listing = create_listing(index, pictures=1)
+            listing.location.latitude = 9.0 + offset
+            listing.location.save()
+            cls.listings.append(listing)
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def search(self, **body):
+        return self.client.post('/properties/search/', {'latitude': 9.0, 'longitude': 38.7, **body}, format='json')
+
+    def test_radius_orders_by_distance(self):
+        results = self.search(radius=10).data['results']
+        self.assertEqual([item['name'] for item in results], ['Property 1', 'Property 3', 'Property 2'])
+        self.assertEqual([round(item['distance_km'], 1) for item in results], [0.0, 1.1, 5.6])
+
+    def test_nearest_returns_the_k_closest(self):
+        results = self.search(nearest=2).data['results']
+        self.assertEqual([item['name'] for item in results], ['Property 1', 'Property 3'])
+
+    def test_nearest_falls_back_beyond_the_neighbourhood(self):
+        results = self.search(latitude=9.5, nearest=4).data['results']
+        self.assertEqual([item['name'] for item in results], ['Property 0', 'Property 2', 'Property 3', 'Property 1'])
+
+    def test_invalid_k_and_radius_are_rejected(self):
+        self.assertEqual(self.search(nearest=0).status_code, 400)
+        self.assertEqual(self.search(nearest=-2).status_code, 400)
+        self.assertEqual(self.search(radius=-1).status_code, 400)
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        documents = [
+            ('Garden flat', 'A quiet flat near a villa'),
+            ('Hilltop villa', 'Large garden and pool'),
+            ('Office', 'Open plan floor'),
+        ]
+        for index, (name, description) in enumerate(documents):
+            listing = create_listing(index, pictures=1)
+            listing.name, listing.description = name, description
+            listing.save()
+        create_auction(name='Villa auction')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def search(self, query):
+        response = self.client.post('/properties/search/', {'search': query}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.data['results']]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.search('villa'), ['Hilltop villa', 'Garden flat'])
+        self.assertEqual(self.search('gard'), ['Garden flat', 'Hilltop villa'])
+        self.assertEqual(self.search('garden pool'), ['Hilltop villa'])
+
+    def test_streamed_matches_keep_their_rank(self):
+        for query in ('villa', 'gard'):
+            response = self.client.post('/properties/search/?stream=ndjson', {'search': query}, format='json')
+            content = b''.join(response.streaming_content).decode('utf-8')
+            self.assertEqual([json.loads(line)['name'] for line in content.splitlines()], self.search(query))
+        queryset = fulltext.search(Property.objects.all(), 'villa')
+        self.assertEqual([len(chunk) for chunk in streaming.iter_keyset_chunks(queryset, 1)], [1, 1])
+
+    def test_queries_without_words_match_nothing(self):
+        for query in ('  ', '!!!'):
+            self.assertEqual(self.search(query), [])
+            for path in ('/auctions/', '/home-loan/'):
+                response = self.client.get(path, {'search': query})
+                self.assertEqual((response.status_code, response.data['results']), (200, []))
+
+    def test_auction_search(self):
+        response = self.client.get('/auctions/', {'search': 'villa'})
+        self.assertEqual([item['name'] for item in response.data['results']], ['Villa auction'])
+
+class SearchStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        cls.listings = [create_listing(index, pictures=1) for index in range(5)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def stream(self, stream_format, body=None):
+        response = self.client.post(f'/properties/search/?stream={stream_format}', body or {}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def test_ndjson(self):
+        response, content = self.stream('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        ids = [json.loads(line)['id'] for line in content.splitlines()]
+        self.assertEqual(ids, [str(pk) for pk in Property.objects.order_by('-created_at', 'pk').values_list('pk', flat=True)])
+
+    def test_json_array_is_read_in_keyset_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(streaming.json_array(Property.objects.order_by('pk'), lambda rows: [str(row.pk) for row in rows], 2))
+        self.assertEqual(json.loads(''.join(chunks)), sorted(str(listing.pk) for listing in self.listings))
+        self.assertEqual(len(queries), 3)
+
+    def test_ranked_searches_stream_in_rank_order(self):
+        for offset, listing in zip((0.03, 0.01, 0.04, 0.0, 0.02), self.listings):
+            listing.location.latitude = 9.0 + offset
+            listing.location.save()
+        summary.refresh([listing.pk for listing in self.listings])
+        body = {'latitude': 9.0, 'longitude': 38.7, 'radius': 50}
+
+        paged = self.client.post('/properties/search/', body, format='json').data['results']
+        _, content = self.stream('ndjson', body)
+        streamed = [json.loads(line)['name'] for line in content.splitlines()]
+        self.assertEqual(streamed, [item['name'] for item in paged])
+        self.assertEqual(streamed, ['Property 3', 'Property 1', 'Property 4', 'Property 0', 'Property 2'])
+
+        queryset = geo.within_radius(Property.objects.all(), 9.0, 38.7, 50, prefix='summary__')
+        chunks = list(streaming.iter_keyset_chunks(queryset, 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([row.name for chunk in chunks for row in chunk], streamed)
+
+    def test_sliced_querysets_keep_their_order(self):
+        _, content = self.stream('json', {'latitude': 9.0, 'longitude': 38.7, 'nearest': 3})
+        self.assertEqual(len(json.loads(content)), 3)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.post('/properties/search/?stream=xml', {}, format='json').status_code, 400)
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.listings = [create_listing(index, pictures=1) for index in range(5)]
+        now = timezone.now()
+        # Two listings share a timestamp, so the id has to break the tie.
+        for listing, minutes in zip(cls.listings, (5, 4, 4, 2, 1)):
+            Property.objects.filter(pk=listing.pk).update(created_at=now - timedelta(minutes=minutes))
+        cls.newest_first = [
+            str(pk) for pk in Property.objects.order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_pages_follow_next_links_without_count(self):
+        response = self.client.get('/properties/', {'pagination': 'cursor', 'limit': 2})
+        self.assertNotIn('count', response.data)
+        seen = self.ids(response)
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen += self.ids(response)
+        self.assertEqual(seen, self.newest_first)
+
+    def test_previous_link_returns_the_earlier_page(self):
+        first = self.client.get('/properties/', {'pagination': 'cursor', 'limit': 2})
+        second = self.client.get(first.data['next'])
+        self.assertEqual(self.ids(self.client.get(second.data['previous'])), self.ids(first))
+
+    def test_inserts_do_not_shift_pages(self):
+        first = self.client.get('/properties/', {'pagination': 'cursor', 'limit': 2})
+        create_listing(99, pictures=1)
+        self.assertEqual(self.ids(self.client.get(first.data['next'])), self.newest_first[2:4])
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'eyJ0IjogMX0='):
+            self.assertEqual(self.client.get('/properties/', {'cursor': cursor}).status_code, 404)
+
+    def test_offset_pagination_stays_the_default(self):
+        response = self.client.get('/properties/', {'limit': 2, 'offset': 2})
+        self.assertEqual((response.data['count'], self.ids(response)), (5, self.newest_first[2:4]))
+
+class PropertySummaryTests(TestCase):
+    def setUp(self):
+        self.listing = create_listing(0)
+
+    def summary(self):
+        return PropertySummary.objects.get(property=self.listing)
+
+    def test_created_with_the_property(self):
+        row = self.summary()
+        self.assertEqual((row.name, row.price, row.bedroom, row.location_name), ('Property 0', 1000, 2, 'Location 0'))
+        self.assertEqual(row.cover_image_url, 'https://img/0/0')
+
+    def test_follows_property_and_nested_changes(self):
+        self.listing.price = 1500
+        self.listing.save()
+        amenties = self.listing.amenties
+        amenties.bedroom = 4
+        amenties.save()
+        self.listing.pictures.filter(is_cover=True).update(is_cover=False)
+        Image.objects.create(property=self.listing, image_url='https://img/cover', is_cover=True)
+        location = self.listing.location
+        location.name = 'Bole'
+        location.latitude = 8.99
+        location.save()
+
+        row = self.summary()
+        self.assertEqual((row.price, row.bedroom, row.cover_image_url), (1500, 4, 'https://img/cover'))
+        self.assertEqual((row.location_name, round(row.geo_lat, 2)), ('Bole', 8.99))
+
+        amenties.delete()
+        self.assertIsNone(self.summary().bedroom)
+
+    def test_removed_with_the_property(self):
+        self.listing.delete()
+        self.assertFalse(PropertySummary.objects.exists())
+
+    def test_missing_rows_are_recreated(self):
+        PropertySummary.objects.all().delete()
+        self.listing.save(update_fields=['description'])
+        self.assertEqual(self.client.get('/properties/', {'type': 'Apartment'}).data['count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pricing.update_listings(Property.objects.all(), discount=10)
+        self.assertEqual(self.summary().discount, 10)
+        self.assertEqual(self.client.get('/properties/', {'type': 'Apartment'}).data['count'], 1)
+
+        PropertySummary.objects.all().delete()
+        call_command('rebuild_property_summaries', missing=True, stdout=io.StringIO())
+        self.assertEqual(self.summary().name, 'Property 0')
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.listing = create_listing(0)
+        cls.other = create_listing(1)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list_is_cached_until_a_nested_row_changes(self):
+        first = self.client.get('/properties/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/properties/')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first['ETag'], second['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Image.objects.create(property=self.listing, image_url='https://img/new')
+        third = self.client.get('/properties/')
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertNotEqual(first['ETag'], third['ETag'])
+
+    def test_detail_invalidation_is_per_object(self):
+        self.client.get(f'/properties/{self.listing.id}/')
+        self.client.get(f'/properties/{self.other.id}/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Amenties.objects.filter(property=self.other).get().save()
+
+        self.assertEqual(self.client.get(f'/properties/{self.listing.id}/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(f'/properties/{self.other.id}/')['X-Cache'], 'MISS')
+
+    def test_conditional_requests(self):
+        response = self.client.get(f'/properties/{self.listing.id}/')
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(f'/properties/{self.listing.id}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        self.listing.location.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listing.location.save()
+        response = self.client.get(f'/properties/{self.listing.id}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['location']['name'], 'Renamed')
+
+    def test_versions_are_bumped_on_commit(self):
+        self.assertEqual(self.client.get(f'/properties/{self.listing.id}/')['X-Cache'], 'MISS')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.listing.name = 'Renamed'
+            self.listing.save()
+            # A read before the commit still sees the old rows, so it must not cache them as current.
+            self.assertEqual(self.client.get(f'/properties/{self.listing.id}/')['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(f'/properties/{self.listing.id}/')
+        self.assertEqual((response['X-Cache'], response.data['name']), ('MISS', 'Renamed'))
+
+
+class RepresentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.listings = [create_listing(index) for index in range(30)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_card_view(self):
+        with assert_query_budget(PropertyViewSet, 'list'):
+            response = self.client.get('/properties/?view=card&limit=30')
+        card = response.data['results'][0]
+        self.assertNotIn('description', card)
+        self.assertNotIn('pictures', card)
+        self.assertEqual(card['bedroom'], 2)
+        self.assertEqual(card['cover_image']['image_url'].split('/')[-1], '0')
+
+    def test_card_expand(self):
+        response = self.client.get('/properties/?view=card&expand=pictures,location')
+        card = response.data['results'][0]
+        self.assertEqual(len(card['pictures']), 3)
+        self.assertIn('latitude', card['location'])
+
+    def test_sparse_fields(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/properties/?fields=id,name,price')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name', 'price'})
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        cls.listings = [create_listing(index) for index in range(10)]
+        Property.objects.filter(pk=cls.listings[0].pk).update(sold_out=True)
+        Property.objects.filter(pk=cls.listings[1].pk).update(rental=True, type='Villa')
+        summary.refresh([cls.listings[0].pk, cls.listings[1].pk])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def test_counts_in_one_query_then_cached(self):
+        response_cache.get_version('property')
+        with self.assertNumQueries(1):
+            response = self.client.post('/properties/facets/', {'min_price': 1000}, format='json')
+        self.assertEqual(response.data['total'], 10)
+        self.assertEqual(response.data['type']['Apartment'], 9)
+        self.assertEqual(response.data['type']['Villa'], 1)
+        self.assertEqual(response.data['status'], {'sale': 8, 'rental': 1, 'sold': 1})
+        self.assertEqual(response.data['bedroom']['2'], 10)
+        self.assertEqual(response.data['bedroom']['3'], 0)
+        self.assertEqual(response.data['price'][0]['count'], 10)
+
+        with self.assertNumQueries(0):
+            self.client.post('/properties/facets/', {'min_price': 1000}, format='json')
+
+    def test_counts_follow_search_filters(self):
+        response = self.client.post('/properties/facets/', {'type': 'Villa'}, format='json')
+        self.assertEqual(response.data['total'], 1)
+        response = self.client.post(
+            '/properties/facets/', {'latitude': 9.0, 'longitude': 38.7, 'nearest': 3}, format='json'
+        )
+        self.assertEqual(response.data['total'], 3)
+
+    def test_query_parameters_are_part_of_the_cache_key(self):
+        totals = [
+            self.client.post(f'/properties/facets/{query}', {}, format='json').data['total']
+            for query in ('', '?type=Villa', '?status=sold', '?type=Villa')
+        ]
+        self.assertEqual(totals, [10, 1, 1, 1])
+
+
+class BulkImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        Loaners.objects.create(name='Bank')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def test_csv_upload(self):
+        rows = (
+            'name,description,price,type,location_name,latitude,longitude,bedroom,bathroom,area,pictures,loaners\n'
+            'Tower A,Flat,1500000,Apartment,Bole,9.0,38.7,3,2,120,https://img/a1|https://img/a2,Bank|Credit\n'
+            'Tower B,Flat,not-a-price,Apartment,Bole,9.0,38.7,3,2,120,,\n'
+            'Tower C,Flat,900000,Villa,Kazanchis,9.1,38.8,4,3,300,https://img/c1,Bank\n'
+        )
+        upload = SimpleUploadedFile('listings.csv', rows.encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/properties/bulk_import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+        self.assertIn('price', response.data['errors'][0]['errors'])
+
+        tower = Property.objects.get(name='Tower A')
+        self.assertEqual(tower.created_by, self.agent)
+        self.assertIsNotNone(tower.location.geohash)
+        self.assertEqual(tower.summary.cover_image_url, 'https://img/a1')
+        self.assertEqual(tower.summary.bedroom, 3)
+        self.assertTrue(SearchEntry.objects.filter(property=tower).exists())
+        self.assertEqual(Loaners.objects.filter(name='Bank').count(), 1)
+        self.assertEqual(LoanerProperty.objects.filter(loaner__name='Bank').count(), 2)
+
+    def test_jsonl_rows_are_validated_per_row(self):
+        listing = {
+            'name': 'Tower D', 'description': 'Flat', 'price': 100, 'type': 'Apartment',
+            'location': {'name': 'Bole', 'latitude': '9.0', 'longitude': '38.7'},
+            'amenties': {'bedroom': 1, 'bathroom': 1, 'area': 50},
+        }
+        stream = io.StringIO('\n'.join([json.dumps(listing), '{broken', json.dumps({'name': 'Tower E'})]))
+        result = importer.import_stream(stream, 'jsonl', chunk_size=2)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error['row'] for error in result.errors], [2, 3])
+        self.assertIn('location', result.errors[1]['errors'])
+
+    def test_undecodable_upload_is_reported_not_raised(self):
+        rows = 'name,description\nTower F,Caf\xe9\n'.encode('latin-1')
+        upload = SimpleUploadedFile('listings.csv', rows, content_type='text/csv')
+        response = self.client.post('/properties/bulk_import/', {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['failed']), (0, 1))
+        self.assertIn('UTF-8', response.data['errors'][0]['errors']['non_field_errors'][0])
+
+
+class ImageBulkCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.listing = create_listing(0, pictures=1)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_batch_is_inserted_with_a_single_cover(self):
+        images = [{'image_url': f'https://img/new/{index}'} for index in range(40)]
+        response = self.client.post(
+            '/images/bulk_create/', {'property_id': str(self.listing.id), 'images': images, 'cover': 1}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 40)
+        self.assertEqual(response.data[0]['property'], str(self.listing.id))
+
+        covers = Image.objects.filter(property=self.listing, is_cover=True)
+        self.assertEqual([image.image_url for image in covers], ['https://img/new/1'])
+        self.listing.summary.refresh_from_db()
+        self.assertEqual(self.listing.summary.cover_image_url, 'https://img/new/1')
+
+    def test_invalid_image_rejects_the_whole_batch(self):
+        images = [{'image_url': 'https://img/new/0'}, {'is_cover': True}]
+        response = self.client.post(
+            '/images/bulk_create/', {'property_id': str(self.listing.id), 'images': images}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Image.objects.filter(property=self.listing).count(), 1)
+
+
+class PropertyCreateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        cls.bank = Loaners.objects.create(name='Bank')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def payload(self):
+        return {
+            'name': 'Listing',
+            'description': 'New listing',
+            'price': 1_000_000,
+            'type': 'Apartment',
+            'location': {'name': 'Bole', 'latitude': 9.0, 'longitude': 38.7},
+            'amenties': {'bedroom': 3, 'bathroom': 2, 'area': 120},
+            'pictures': [{'image_url': f'https://img/new/{index}', 'is_cover': index == 0} for index in range(20)],
+            'loaners': [{'name': 'Bank'}, {'name': 'Credit Union'}],
+        }
+
+    def test_nested_create_in_a_handful_of_queries(self):
+        with assert_query_budget(PropertyViewSet, 'create'):
+            response = self.client.post('/properties/', self.payload(), format='json')
+        self.assertEqual(response.status_code, 201)
+
+        data = response.data['detail']
+        listing = Property.objects.get(pk=data['id'])
+        self.assertEqual(len(data['pictures']), 20)
+        self.assertEqual(data['amenties']['bedroom'], 3)
+        self.assertEqual(sorted(link['loaner']['name'] for link in data['loaner_detail']), ['Bank', 'Credit Union'])
+        self.assertEqual(listing.created_by, self.agent)
+        self.assertEqual(Loaners.objects.filter(name='Bank').count(), 1)
+        self.assertEqual(listing.summary.cover_image_url, 'https://img/new/0')
+
+    def test_failed_create_leaves_nothing_behind(self):
+        with mock.patch.object(Image.objects, 'bulk_create', side_effect=DatabaseError('boom')):
+            response = self.client.post('/properties/', self.payload(), format='json')
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Location.objects.exists())
+        self.assertFalse(Property.objects.exists())
+
+
+class PropertyUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        cls.bank = Loaners.objects.create(name='Bank')
+        cls.listing = create_listing(0, cls.bank, pictures=40)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def patch(self, data):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.patch(f'/properties/{self.listing.id}/', data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        # The summary row and the change log entry are derived; only writes to source tables are counted.
+        writes = [
+            query['sql'].split(' ', 1)[0] for query in captured.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+            and 'propertysummary' not in query['sql'] and 'propertychange' not in query['sql']
+        ]
+        return response, writes
+
+    def test_price_change_is_one_update(self):
+        with assert_query_budget(PropertyViewSet, 'partial_update'):
+            response, writes = self.patch({'price': 2000})
+        self.assertEqual(writes, ['UPDATE'])
+        self.assertEqual(response.data['price'], 2000)
+        self.assertEqual(len(response.data['pictures']), 40)
+        self.listing.summary.refresh_from_db()
+        self.assertEqual(self.listing.summary.price, 2000)
+
+    def test_unchanged_nested_payload_writes_nothing(self):
+        response = self.client.get(f'/properties/{self.listing.id}/')
+        data = {
+            'price': response.data['price'],
+            'amenties': {'bedroom': 2, 'bathroom': 1, 'area': 80},
+            'pictures': [{'image_url': image.image_url, 'is_cover': image.is_cover} for image in self.listing.pictures.all()],
+            'loaners': [{'name': 'Bank'}],
+        }
+        _, writes = self.patch(data)
+        self.assertEqual(writes, [])
+
+    def test_pictures_and_loaners_are_diffed(self):
+        kept = list(Image.objects.filter(property=self.listing).order_by('image_url')[:2])
+        pictures = [
+            {'image_url': kept[0].image_url, 'is_cover': False},
+            {'image_url': kept[1].image_url, 'is_cover': True},
+            {'image_url': 'https://img/new/0'},
+        ]
+        response, writes = self.patch({'pictures': pictures, 'loaners': [{'name': 'Credit Union'}]})
+        # Images: one DELETE, UPDATE and INSERT; loaners: INSERT, link DELETE and link INSERT.
+        self.assertEqual(sorted(writes), ['DELETE', 'DELETE', 'INSERT', 'INSERT', 'INSERT', 'UPDATE'])
+
+        images = {image.image_url: image for image in Image.objects.filter(property=self.listing)}
+        self.assertEqual(set(images), {kept[0].image_url, kept[1].image_url, 'https://img/new/0'})
+        self.assertEqual(images[kept[0].image_url].pk, kept[0].pk)
+        self.assertEqual([url for url, image in images.items() if image.is_cover], [kept[1].image_url])
+        self.assertEqual(
+            list(self.listing.loaners.values_list('loaner__name', flat=True)), ['Credit Union']
+        )
+        self.assertEqual(
+            sorted(picture['image_url'] for picture in response.data['pictures']),
+            sorted(picture['image_url'] for picture in pictures),
+        )
+        self.assertEqual([link['loaner']['name'] for link in response.data['loaner_detail']], ['Credit Union'])
+        self.listing.summary.refresh_from_db()
+        self.assertEqual(self.listing.summary.cover_image_url, kept[1].image_url)
+
+    def test_cached_detail_is_replaced_after_the_commit(self):
+        cache.clear()
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get(f'/properties/{self.listing.id}/')['X-Cache'], 'MISS')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.patch({'pictures': [{'image_url': 'https://img/new/0', 'is_cover': True}]})
+            self.assertEqual(anonymous.get(f'/properties/{self.listing.id}/')['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        response = anonymous.get(f'/properties/{self.listing.id}/')
+        self.assertEqual([picture['image_url'] for picture in response.data['pictures']], ['https://img/new/0'])
+
+    def test_amenities_are_updated(self):
+        _, writes = self.patch({'amenties': {'bedroom': 4, 'bathroom': 1, 'area': 80}})
+        self.assertEqual(writes, ['UPDATE'])
+        self.listing.amenties.refresh_from_db()
+        self.assertEqual(self.listing.amenties.bedroom, 4)
+        self.assertEqual(Location.objects.get(pk=self.listing.location_id).name, 'Location 0')
+
+
+class BulkPricingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        cls.listings = [create_listing(index, pictures=1) for index in range(30)]
+        Property.objects.filter(pk__in=[listing.pk for listing in cls.listings[:12]]).update(created_by=cls.agent)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def test_discount_by_ids_is_one_update(self):
+        ids = [str(listing.pk) for listing in self.listings[:20]]
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post('/properties/bulk_discount/', {'ids': ids, 'discount': 5}, format='json')
+        self.assertEqual(response.data, {'updated': 20})
+        updates = [
+            query['sql'] for query in captured.captured_queries if query['sql'].startswith('UPDATE "properties_property"')
+        ]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(Property.objects.filter(discount=5).count(), 20)
+        self.assertEqual(PropertySummary.objects.filter(discount=5).count(), 20)
+        history = PropertyPriceHistory.objects.filter(property=self.listings[0]).get()
+        self.assertEqual((history.price, history.discount, history.changed_by), (1000, 5, self.agent))
+
+    def test_filter_selects_an_agents_inventory(self):
+        response = self.client.post(
+            '/properties/bulk_sold_out/', {'filter': {'created_by': self.agent.id}, 'sold_out': True}, format='json'
+        )
+        self.assertEqual(response.data, {'updated': 12})
+        self.assertEqual(set(Property.objects.filter(sold_out=True)), set(self.listings[:12]))
+        self.assertEqual(PropertyPriceHistory.objects.filter(sold_out=True).count(), 12)
+
+    def test_cached_detail_is_invalidated(self):
+        anonymous = APIClient()
+        anonymous.get(f'/properties/{self.listings[0].pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/properties/bulk_discount/', {'ids': [str(self.listings[0].pk)], 'discount': 10}, format='json')
+        self.assertEqual(anonymous.get(f'/properties/{self.listings[0].pk}/').data['discount'], 10)
+
+    def test_selection_is_required(self):
+        response = self.client.post('/properties/bulk_discount/', {'discount': 5}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            '/properties/bulk_discount/', {'ids': [str(self.listings[0].pk)], 'filter': {}, 'discount': 5}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_discount_is_validated(self):
+        listing = str(self.listings[0].pk)
+        for body in ({'id': listing, 'discount': 'abc'}, {'id': listing}, {'id': listing, 'discount': 101}, {'id': 'abc', 'discount': 5}):
+            self.assertEqual(self.client.post('/properties/discount/', body, format='json').status_code, 400)
+        self.assertEqual(self.listings[0].price_history.count(), 0)
+
+        self.assertEqual(self.client.post('/properties/discount/', {'id': listing, 'discount': 15}, format='json').status_code, 200)
+        self.listings[0].refresh_from_db()
+        self.assertEqual((self.listings[0].discount, self.listings[0].price_history.count()), (15, 1))
+
+    def test_single_sold_out_toggles(self):
+        self.client.post('/properties/sold_out/', {'id': str(self.listings[0].pk)}, format='json')
+        self.listings[0].refresh_from_db()
+        self.assertTrue(self.listings[0].sold_out)
+        self.assertTrue(self.listings[0].summary.sold_out)
+        self.assertEqual(self.listings[0].price_history.count(), 1)
+
+
+@override_settings(PROPERTY_CHANGES_SETTLE_SECONDS=0)
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = UserAccount.objects.create_user('Agent', 'One', '0911000000', 'agent', password='pass', role='agent')
+        cls.listings = [create_listing(index, pictures=2) for index in range(5)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.agent)
+
+    def sync(self, since=0, **params):
+        response = self.client.get('/properties/changes/', {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_sync_lists_each_property_once(self):
+        with assert_query_budget(PropertyViewSet, 'changes'):
+            data = self.sync()
+        self.assertEqual([entry['id'] for entry in data['results']], [listing.pk for listing in self.listings])
+        self.assertTrue(all(len(entry['data']['pictures']) == 2 for entry in data['results']))
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.sync(data['cursor'])['results'], [])
+
+    def test_delta_contains_changed_records_and_tombstones(self):
+        cursor = self.sync()['cursor']
+        first, second, third = self.listings[:3]
+        third_id = third.pk
+
+        self.client.patch(f'/properties/{first.pk}/', {'price': 5000}, format='json')
+        Image.objects.create(property=second, image_url='https://img/new')
+        third.delete()
+        self.client.post('/properties/bulk_sold_out/', {'ids': [str(first.pk)], 'sold_out': True}, format='json')
+
+        data = self.sync(cursor)
+        entries = {entry['id']: entry for entry in data['results']}
+        self.assertEqual([entry['id'] for entry in data['results']], [second.pk, third_id, first.pk])
+        self.assertEqual(entries[first.pk]['action'], PropertyChange.SOLD_OUT)
+        self.assertEqual((entries[first.pk]['data']['price'], entries[first.pk]['data']['sold_out']), (5000, True))
+        self.assertEqual(len(entries[second.pk]['data']['pictures']), 3)
+        self.assertEqual(
+            {key: entries[third_id][key] for key in ('action', 'deleted', 'data')},
+            {'action': PropertyChange.DELETE, 'deleted': True, 'data': None},
+        )
+
+    def test_nested_create_is_logged_once(self):
+        cursor = self.sync()['cursor']
+        response = self.client.post('/properties/', {
+            'name': 'New', 'description': 'New listing', 'price': 10,
+            'location': {'name': 'Bole', 'latitude': 9.0, 'longitude': 38.7},
+            'amenties': {'bedroom': 1, 'bathroom': 1, 'area': 40},
+            'pictures': [{'image_url': 'https://img/new/0'}],
+        }, format='json')
+        self.assertEqual(
+            list(PropertyChange.objects.filter(id__gt=cursor).values_list('property_id', 'action')),
+            [(uuid.UUID(response.data['detail']['id']), PropertyChange.CREATE)],
+        )
+
+    def test_pages_follow_the_cursor(self):
+        data = self.sync(limit=2)
+        self.assertTrue(data['has_more'])
+        seen = [entry['id'] for entry in data['results']]
+        while data['has_more']:
+            data = self.sync(data['cursor'], limit=2)
+            seen += [entry['id'] for entry in data['results']]
+        self.assertEqual(seen, [listing.pk for listing in self.listings])
+
+    def test_recent_changes_are_held_back(self):
+        with override_settings(PROPERTY_CHANGES_SETTLE_SECONDS=60):
+            self.assertEqual(self.sync()['results'], [])
+
+
+@override_settings(PROPERTY_CHANGES_SETTLE_SECONDS=0)
+class CatalogueSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = UserAccount.objects.create_user('Admin', 'One', '0911000000', 'admin', password='pass', role='admin')
+        cls.admin.is_staff = True
+        cls.admin.save()
+        loaner = Loaners.objects.create(name='Bank')
+        cls.listings = [create_listing(index, loaner) for index in range(7)]
+        cls.listings[-1].sold_out = True
+        cls.listings[-1].save()
+
+    def read(self, data):
+        return [json.loads(line) for line in gzip.decompress(data).decode('utf-8').splitlines()]
+
+    def test_stream_is_complete_and_carries_its_generation(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/properties/snapshot/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+
+        header, *records, trailer = self.read(b''.join(response.streaming_content))
+        generation = PropertyChange.objects.latest('id').id
+        self.assertEqual(header['snapshot']['generation'], generation)
+        self.assertEqual(response['X-Snapshot-Generation'], str(generation))
+        self.assertEqual(trailer['end'], {'generation': generation, 'count': 6})
+        self.assertEqual(sorted(record['id'] for record in records), sorted(str(listing.pk) for listing in self.listings[:6]))
+
+        record = records[0]
+        self.assertEqual(record['amenties'], {'bedroom': 2, 'bathroom': 1, 'area': 80.0})
+        self.assertTrue(record['cover_image']['image_url'].endswith('/0'))
+        self.assertEqual([loaner['name'] for loaner in record['loaners']], ['Bank'])
+
+    def test_chunks_query_a_bounded_number_of_times(self):
+        generation, chunks = snapshot.export(include_sold_out=True, chunk_size=3)
+        with CaptureQueriesContext(connection) as queries:
+            header, *records, trailer = self.read(b''.join(chunks))
+        self.assertEqual(trailer['end']['count'], 7)
+        # Three chunks, each one query for the properties and one per prefetch.
+        self.assertEqual(len(queries), 9)
+
+    def test_command_writes_the_same_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'catalogue.ndjson.gz')
+            call_command('export_catalogue', output=output, stdout=io.StringIO())
+            with open(output, 'rb') as file:
+                lines = self.read(file.read())
+        self.assertEqual(lines[-1]['end']['count'], 6)
+
+    def test_requires_admin(self):
+        client = APIClient()
+        self.assertEqual(client.get('/properties/snapshot/').status_code, 401)
+        customer = UserAccount.objects.create_user('Customer', 'One', '0911000001', 'customer', password='pass')
+        client.force_authenticate(customer)
+        self.assertEqual(client.get('/properties/snapshot/').status_code, 403)
+
+
+def create_auction(index=0, **kwargs):
+    location = Location.objects.create(name=f'Auction {index}', latitude=9.0, longitude=38.7)
+    defaults = {
+        'name': f'Auction {index}',
+        'description': 'Auction',
+        'location': location,
+        'starting_bid': 100,
+        'start_date': timezone.now(),
+        'end_date': timezone.now() + timedelta(days=1),
+    }
+    return Auction.objects.create(**{**defaults, **kwargs})
+
+
+class BiddingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bidder = UserAccount.objects.create_user('Bid', 'Der', '0911000001', 'bidder', password='pass')
+        cls.auction = create_auction()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.bidder)
+
+    def bid(self, amount, auction=None):
+        auction = auction or self.auction
+        return self.client.post(f'/auctions/{auction.id}/place_bid/', {'bid_amount': amount}, format='json')
+
+    def test_only_higher_bids_are_accepted(self):
+        self.assertEqual(self.bid(50).data['error'], 'Bid must be higher than starting bid')
+        self.assertEqual(self.bid(100).status_code, 201)
+        self.assertEqual(self.bid(100).data['error'], 'Bid must be higher than current bid')
+        self.assertEqual(self.bid(150).status_code, 201)
+
+        self.auction.refresh_from_db()
+        self.assertEqual((self.auction.current_bid, self.auction.bid_count), (150, 2))
+        self.assertEqual(bidding.highest_bid(self.auction.id).amount, 150)
+        history = self.client.get(f'/auctions/{self.auction.id}/bids/').data['results']
+        self.assertEqual([bid['amount'] for bid in history], [150, 100])
+
+    def test_closed_and_missing_auctions(self):
+        ended = create_auction(1, end_date=timezone.now() - timedelta(minutes=1))
+        cancelled = create_auction(2, status='CANCELLED')
+        self.assertEqual(self.bid(500, ended).data['error'], 'Auction is closed')
+        self.assertEqual(self.bid(500, cancelled).data['error'], 'Auction is closed')
+        upcoming = create_auction(3, start_date=timezone.now() + timedelta(hours=1), status='PENDING')
+        self.assertEqual(self.bid(500, upcoming).data['error'], 'Auction has not started')
+        self.assertFalse(Bid.objects.filter(auction=upcoming).exists())
+        response = self.client.post('/auctions/not-a-uuid/place_bid/', {'bid_amount': 500}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+@skipIf(connection.vendor == 'sqlite', 'SQLite locks the whole database for each write transaction')
+class ConcurrentBidTests(TransactionTestCase):
+    def test_parallel_bids_are_not_lost(self):
+        bidders = [
+            UserAccount.objects.create_user('Bid', 'Der', f'09110000{index:02}', f'bidder{index}', password='pass')
+            for index in range(4)
+        ]
+        auction = create_auction()
+        amounts = list(range(100, 300))
+        random.Random(1).shuffle(amounts)
+
+        results = concurrent_bids(auction.pk, bidders, amounts, workers=8)
+
+        self.assertEqual(results['errors'], [])
+        check_bids(auction, amounts, results['accepted'])
+
+
+class AuctionSchedulerTests(TestCase):
+    def test_due_auctions_advance_once(self):
+        now = timezone.now()
+        hour = timedelta(hours=1)
+        upcoming = create_auction(0, start_date=now + hour, end_date=now + 2 * hour)
+        started = create_auction(1, start_date=now - hour, end_date=now + hour)
+        missed = create_auction(2, start_date=now - 2 * hour, end_date=now - hour)
+        ended = create_auction(3, start_date=now - 2 * hour, end_date=now - hour, status='ACTIVE')
+        cancelled = create_auction(4, start_date=now - 2 * hour, end_date=now - hour, status='CANCELLED')
+
+        self.assertEqual(scheduler.advance_statuses(now, batch_size=1), {'completed': 2, 'activated': 1})
+        statuses = dict(Auction.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[auction.pk] for auction in (upcoming, started, missed, ended, cancelled)],
+            ['PENDING', 'ACTIVE', 'COMPLETED', 'COMPLETED', 'CANCELLED'],
+        )
+
+        with self.assertNumQueries(2):
+            self.assertEqual(scheduler.advance_statuses(now), {'completed': 0, 'activated': 0})
+
+
+class AuctionEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bidder = UserAccount.objects.create_user('Bid', 'Der', '0911000001', 'bidder', password='pass')
+        cls.auction = create_auction()
+
+    async def test_subscribers_receive_new_bids(self):
+        queue, state = await events.broker.subscribe(self.auction.id)
+        self.assertEqual(state['bid_count'], 0)
+
+        await sync_to_async(bidding.place_bid)(self.auction.id, self.bidder, 150)
+        event = await asyncio.wait_for(queue.get(), 5)
+        self.assertEqual((event['event'], event['id'], event['data']['amount']), ('bid', 1, 150))
+        events.broker.unsubscribe(self.auction.id, queue)
+
+    async def test_resume_and_long_poll(self):
+        for amount in (100, 120, 130):
+            await sync_to_async(bidding.place_bid)(self.auction.id, self.bidder, amount)
+
+        client = AsyncClient()
+        response = await client.get(f'/auctions/{self.auction.id}/events/?transport=poll')
+        self.assertEqual(response.json()['last_event_id'], 3)
+
+        response = await client.get(
+            f'/auctions/{self.auction.id}/events/?transport=poll', headers={'Last-Event-ID': '1'}
+        )
+        found = response.json()['events']
+        self.assertEqual([(event['id'], event['event']) for event in found], [(2, 'bid'), (3, 'bid'), (3, 'state')])
+        self.assertEqual([event['data'].get('amount') for event in found[:2]], [120, 130])
+
+    async def test_event_stream(self):
+        response = await AsyncClient().get(f'/auctions/{self.auction.id}/events/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        first = await anext(aiter(response.streaming_content))
+        self.assertTrue(first.decode().startswith('id: 0\nevent: state\n'))
+        await response.streaming_content.aclose()
+
+    def test_event_stream_is_refused_under_wsgi(self):
+        path = f'/auctions/{self.auction.id}/events/'
+        self.assertEqual(self.client.get(path, HTTP_ACCEPT='text/event-stream').status_code, 406)
+        response = self.client.get(path, {'transport': 'poll'})
+        self.assertEqual((response.status_code, response.json()['last_event_id']), (200, 0))
+
+    @override_settings(AUCTION_EVENTS_LONG_POLL_TIMEOUT=0.1)
+    async def test_long_poll_times_out_empty(self):
+        response = await AsyncClient().get(
+            f'/auctions/{self.auction.id}/events/?transport=poll', headers={'Last-Event-ID': '0'}
+        )
+        self.assertEqual(response.json(), {'events': [], 'last_event_id': 0})
+
+
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.listings = [create_listing(index) for index in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_server_timing_and_metrics_endpoint(self):
+        response = self.client.get('/properties/')
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        staff = UserAccount.objects.create_user('Staff', 'One', '0911000009', 'staff', password='pass')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff)
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('http_request_db_queries_count{route="property-list",method="GET"}', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="property-list",method="GET",le="+Inf"}', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    def test_repeated_queries_are_logged(self):
+        self.assertEqual(
+            metrics.fingerprint("SELECT * FROM t WHERE id = 'a' AND n IN (%s, %s, %s)"),
+            metrics.fingerprint("SELECT * FROM t WHERE id = 'b' AND n IN (%s)"),
+        )
+        with override_settings(REQUEST_METRICS_REPEATED_QUERIES=1), self.assertLogs('api.metrics', 'WARNING') as logs:
+            self.client.get('/properties/')
+        self.assertIn('repeated 1x: SELECT', logs.output[0])
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_is_deterministic_and_scenarios_succeed(self):
+        # Rows already in the database must not shift the generated ids.
+        UserAccount.objects.create_user('Existing', 'User', '0911000000', 'existing', password='pass')
+        users = seed.seed(size=20, seed=7)
+        self.assertEqual(PropertySummary.objects.count(), 20)
+        first = list(Property.objects.order_by('id').values_list('id', 'price', 'created_by_id'))
+
+        response_cache.get_cache().set('unrelated', 1)
+        report = benchmark.run(users, iterations=2, warmup=0, memory_iterations=1)
+        for name, result in report['results'].items():
+            self.assertEqual(result['status_codes'], [200], name)
+        self.assertEqual(response_cache.get_cache().get('unrelated'), 1)
+
+        Location.objects.all().delete()
+        UserAccount.objects.all().delete()
+        Loaners.objects.all().delete()
+        seed.seed(size=20, seed=7)
+        self.assertEqual(list(Property.objects.order_by('id').values_list('id', 'price', 'created_by_id')), first)
+
+    def test_explicit_timestamps_are_restored_after_errors(self):
+        field = Property._meta.get_field('created_at')
+        with self.assertRaises(RuntimeError):
+            with seed.explicit_timestamps(Property):
+                self.assertFalse(field.auto_now_add)
+                raise RuntimeError
+        self.assertTrue(field.auto_now_add)
+
+    def test_generate_data_covers_every_model(self):
+        call_command('generate_data', scale=60, seed=3, chunk_size=25, stdout=io.StringIO())
+        for model in (Property, Location, Amenties, Image, Auction, AuctionImage, Bid, Reviews, RequestedTour, Wishlist):
+            self.assertTrue(model.objects.exists(), model.__name__)
+        self.assertEqual(Wishlist.objects.count(), UserAccount.objects.count())
+        self.assertEqual(Image.objects.filter(is_cover=True).count(), Property.objects.count())
+        # Generated timestamps are kept rather than overwritten by auto_now_add.
+        self.assertLess(Property.objects.order_by('created_at').first().created_at, timezone.now() - timedelta(days=1))
+        for auction in Auction.objects.filter(bid_count__gt=0):
+            self.assertEqual(auction.bids.count(), auction.bid_count)
+            self.assertEqual(auction.bids.first().amount, auction.current_bid)
@@ -14,5 +14,6 @@ router.register(r'tour', RequestTourViewset)
 router.register(r'home-loan', HomeLoanViewSet)
 
 urlpatterns = [
+    path('auctions/<uuid:pk>/events/', auction_events, name='auction-events'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,11 +1,22 @@
+import io
+
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Prefetch
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+from django.db import transaction
 from properties.serializers import *
 from properties.permissions import *
+from properties.pagination import FeedPagination
+from properties.query_plan import QueryPlanMixin
+from properties.response_cache import CachedResponseMixin
+from properties import bidding, changes, events, facets, fulltext, importer, geo, pricing, response_cache, snapshot, streaming, summary
 
 
 class LocationViewSet(viewsets.ModelViewSet):
@@ -13,128 +24,282 @@ class LocationViewSet(viewsets.ModelViewSet):
     serializer_class = LocationSerializer
     # permission_classes = [IsAuthenticated]
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(CachedResponseMixin, QueryPlanMixin, viewsets.ModelViewSet):
     serializer_class = PropertySerializer
     queryset = Property.objects.all() 
     permission_classes = [PropertyPermission]
+    pagination_class = FeedPagination
+    query_budget = {'list': 5, 'retrieve': 4, 'search': 5, 'create': 17, 'partial_update': 11, 'changes': 6}
+    cache_resource = 'property'
+    card_actions = ('list', 'search')
+
+    def get_serializer_class(self):
+        if self.action in self.card_actions and self.request.query_params.get('view') == 'card':
+            return PropertyCardSerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
-        queryset = super().get_queryset().select_related(
-            'location'
-        ).prefetch_related(
-            Prefetch(
-                'pictures',
-            ),
-            'amenties',
-        )
+        queryset = super().get_queryset()
 
         filters = {}
         
         property_type = self.request.query_params.get('type')
         if property_type:
-            filters['type'] = property_type
+            filters['summary__type'] = property_type
 
         status = self.request.query_params.get("status")
         if status is not None:
-            filters['sold_out'] = status.lower() == 'sold'
-            if not filters['sold_out']:
-                filters['rental'] = status.lower() == "rental" 
+            filters['summary__sold_out'] = status.lower() == 'sold'
+            if not filters['summary__sold_out']:
+                filters['summary__rental'] = status.lower() == "rental" 
 
 
         if filters:
             queryset = queryset.filter(**filters)
 
         return queryset
-    @action(detail=False, methods=['post'])
-    def search(self, request):
-        queryset = Property.objects.all()
+    def search_queryset(self, data):
+        queryset = self.filter_queryset(self.get_queryset())
 
-        property_type = request.data.get('type')
+        property_type = data.get('type')
         if property_type:
             if isinstance(property_type, list):
-                queryset = queryset.filter(type__in=property_type)
+                queryset = queryset.filter(summary__type__in=property_type)
             else:
-                queryset = queryset.filter(type=property_type)
+                queryset = queryset.filter(summary__type=property_type)
 
         try:
-            min_price = float(request.data.get('min_price')) if request.data.get('min_price') is not None else None
-            max_price = float(request.data.get('max_price')) if request.data.get('max_price') is not None else None
+            min_price = float(data.get('min_price')) if data.get('min_price') is not None else None
+            max_price = float(data.get('max_price')) if data.get('max_price') is not None else None
         except (ValueError, TypeError):
             min_price = None
             max_price = None
 
-        name = request.data.get('name')
-        general_search = request.data.get('search')
+        name = data.get('name')
+        general_search = data.get('search')
+
+        created_by = data.get('created_by')
+        if created_by:
+            try:
+                queryset = queryset.filter(created_by_id=int(created_by))
+            except (ValueError, TypeError):
+                pass
 
         if name:
             queryset = queryset.filter(name__iexact=name)
 
         if general_search:
-            queryset = queryset.filter(
-                Q(name__icontains=general_search) | 
-                Q(description__icontains=general_search) | 
-                Q(location__name__icontains=general_search)
-            )
+            queryset = fulltext.search(queryset, general_search)
 
         if min_price is not None:
-            queryset = queryset.filter(price__gte=min_price)
+            queryset = queryset.filter(summary__price__gte=min_price)
         if max_price is not None:
-            queryset = queryset.filter(price__lte=max_price)
+            queryset = queryset.filter(summary__price__lte=max_price)
 
-        bedroom = request.data.get('bedroom')
+        bedroom = data.get('bedroom')
         if bedroom and bedroom != "Any":
-            queryset = queryset.filter(amenties__bedroom__gte=int(bedroom))
+            queryset = queryset.filter(summary__bedroom__gte=int(bedroom))
 
-        bathroom = request.data.get('bathroom')
+        bathroom = data.get('bathroom')
         if bathroom and bathroom != "Any":
-            queryset = queryset.filter(amenties__bathroom__gte=int(bathroom))
+            queryset = queryset.filter(summary__bathroom__gte=int(bathroom))
 
-        area = request.data.get('area')
+        area = data.get('area')
         if area and area != "Any":
-            queryset = queryset.filter(amenties__area__gte=int(area))
+            queryset = queryset.filter(summary__area__gte=int(area))
             
-        latitude = request.data.get('latitude')
-        longitude = request.data.get('longitude')
-        radius = request.data.get('radius', 10) 
+        latitude = data.get('latitude')
+        longitude = data.get('longitude')
+        radius = data.get('radius', 10) 
+        nearest = data.get('nearest')
         
         if latitude and longitude:
             try:
-                radius_degrees = float(radius) / 111  # 1 degree ≈ 111km
                 lat = float(latitude)
                 lng = float(longitude)
-                        
-                queryset = queryset.filter(
-                    location__latitude__gte=lat - radius_degrees,
-                    location__latitude__lte=lat + radius_degrees,
-                    location__longitude__gte=lng - radius_degrees,
-                    location__longitude__lte=lng + radius_degrees
-                )
+
+                if nearest not in (None, ''):
+                    k = int(nearest)
+                    if k < 1:
+                        raise ValidationError({'nearest': 'Must be a positive integer.'})
+                    queryset = geo.nearest(queryset, lat, lng, k, prefix='summary__')
+                else:
+                    radius = float(radius)
+                    if radius < 0:
+                        raise ValidationError({'radius': 'Must not be negative.'})
+                    queryset = geo.within_radius(queryset, lat, lng, radius, prefix='summary__')
             except (ValueError, TypeError):
                 pass
 
+        return queryset
+
+    @action(detail=False, methods=['post'])
+    def search(self, request):
+        queryset = self.search_queryset(request.data)
+
+        stream_format = request.query_params.get('stream')
+        if stream_format:
+            if stream_format not in streaming.STREAMS:
+                return Response(
+                    {"detail": f"Unsupported stream format, expected one of: {', '.join(streaming.STREAMS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return streaming.stream_response(
+                queryset,
+                lambda rows: self.get_serializer(rows, many=True).data,
+                stream_format
+            )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Delta sync: the properties changed after ``?since=<cursor>``, each once in cursor
+        order, with its current representation or a tombstone if it has been deleted.
+        Clients pass the returned ``cursor`` back until ``has_more`` is false.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', changes.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"detail": "'since' and 'limit' must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, changes.MAX_LIMIT))
+
+        entries, has_more = changes.feed(since, limit)
+        live = list(self.filter_queryset(
+            Property.objects.filter(pk__in=[property_id for _, property_id, _ in entries])
+        ))
+        records = dict(zip((instance.pk for instance in live), self.get_serializer(live, many=True).data))
+
+        results = [
+            {
+                'cursor': cursor,
+                'id': property_id,
+                'action': action,
+                'deleted': property_id not in records,
+                'data': records.get(property_id),
+            }
+            for cursor, property_id, action in entries
+        ]
+        return Response({
+            'results': results,
+            'cursor': entries[-1][0] if entries else since,
+            'has_more': has_more,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def snapshot(self, request):
+        """
+        The whole catalogue as gzip-compressed NDJSON, streamed chunk by chunk. Follow
+        ``changes`` from ``X-Snapshot-Generation`` to stay in sync afterwards.
+        """
+        include_sold_out = request.query_params.get('include_sold_out', '').lower() in ('1', 'true')
+        generation, chunks = snapshot.export(include_sold_out)
+        response = StreamingHttpResponse(chunks, content_type='application/gzip')
+        response['Content-Disposition'] = f'attachment; filename="catalogue-{generation}.ndjson.gz"'
+        response['X-Snapshot-Generation'] = str(generation)
+        response['Cache-Control'] = 'no-store'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def facets(self, request):
+        return Response(facets.cached_count(request.data, self.search_queryset, request.query_params))
+
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        created_by = request.user if request.user.is_authenticated else None
+
+        if isinstance(request.data, list):
+            rows = enumerate(request.data, start=1)
+            return Response(importer.run(rows, created_by=created_by).as_dict())
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Upload a CSV or JSONL file as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.data.get('import_format') or importer.detect_format(upload.name)
+        if import_format not in importer.FORMATS:
+            return Response(
+                {"detail": f"Unsupported import format, expected one of: {', '.join(importer.FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+        result = importer.import_stream(stream, import_format, created_by=created_by)
+        return Response(result.as_dict())
+
     @action(detail=False, methods=['POST'])
     def discount(self, request, pk=None):
-        discount={"discount":self.request.data.get("discount")}
-        property = Property.objects.filter(pk=self.request.data.get("id")).update(**discount)
-
+        serializer = DiscountSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pricing.update_listings(
+            Property.objects.filter(pk=serializer.validated_data['id']),
+            changed_by=self.changed_by(),
+            discount=serializer.validated_data['discount'],
+        )
         return Response({"detail": "Updated successfully"}, status=status.HTTP_200_OK)
     
 
     @action(detail=False, methods=['POST'])
     def sold_out(self, request, pk=None):
         property_id = self.request.data.get("id")
-        property = Property.objects.filter(pk=property_id).first()
+        sold_out = Property.objects.filter(pk=property_id).values_list('sold_out', flat=True).first()
 
-        if property is None:
+        if sold_out is None:
             return Response({"detail": "Property not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        property.sold_out = not property.sold_out
-        property.save()
-
+        pricing.update_listings(
+            Property.objects.filter(pk=property_id), changed_by=self.changed_by(), sold_out=not sold_out
+        )
         return Response({"detail": "Updated successfully"}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['POST'])
+    def bulk_discount(self, request):
+        serializer = BulkDiscountSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = pricing.update_listings(
+            self.selected_queryset(serializer.validated_data),
+            changed_by=self.changed_by(),
+            discount=serializer.validated_data['discount'],
+        )
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['POST'])
+    def bulk_sold_out(self, request):
+        serializer = BulkSoldOutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = pricing.update_listings(
+            self.selected_queryset(serializer.validated_data),
+            changed_by=self.changed_by(),
+            sold_out=serializer.validated_data['sold_out'],
+        )
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+    def selected_queryset(self, data):
+        if 'ids' in data:
+            return Property.objects.filter(pk__in=data['ids'])
+        return self.search_queryset(data['filter'])
+
+    def changed_by(self):
+        return self.request.user if self.request.user.is_authenticated else None
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        # Unlike UpdateModelMixin, keep the prefetched pictures and loaner links:
+        # PropertySerializer.update keeps them in step with what it wrote.
+        return Response(serializer.data)
+
     def create(self, request, *args, **kwargs):
         try:
             data = request.data.copy()
@@ -142,9 +307,7 @@ class PropertyViewSet(viewsets.ModelViewSet):
             
             serializer = self.get_serializer(data=data, context={'request': request})
             serializer.is_valid(raise_exception=True)
-            properties = serializer.save()
-            properties.refresh_from_db()
-            serializer = self.get_serializer(properties)
+            serializer.save()
 
             headers = self.get_success_headers(serializer.data)
             return Response({"detail": serializer.data}, status=status.HTTP_201_CREATED, headers=headers)
@@ -157,9 +320,11 @@ class PropertyViewSet(viewsets.ModelViewSet):
 
 
 
-class HomeLoanViewSet(viewsets.ModelViewSet):
+class HomeLoanViewSet(CachedResponseMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset=HomeLoan.objects.all()
     serializer_class = HomeLoanSerializer
+    query_budget = {'list': 3, 'retrieve': 2}
+    cache_resource = 'home_loan'
     # permission_classes = [PropertyPermission]
 
     def get_queryset(self):
@@ -167,8 +332,7 @@ class HomeLoanViewSet(viewsets.ModelViewSet):
         
         general_search = self.request.query_params.get('search', None)
         if general_search:
-            print(general_search)
-            queryset = queryset.filter(Q(name__icontains=general_search) | Q( description__icontains=general_search))
+            queryset = fulltext.search(queryset, general_search)
         return queryset
     
 
@@ -181,19 +345,32 @@ class ImageViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
         property_id = request.data.get('property_id')
-        images = request.data.get('images', [])
-        
-        property = get_object_or_404(Property, id=property_id)
-        created_images = []
+        property = get_object_or_404(Property.objects.only('id'), id=property_id)
 
-        for image_data in images:
-            image_data['property'] = property.id
-            serializer = self.get_serializer(data=image_data)
-            serializer.is_valid(raise_exception=True)
-            self.perform_create(serializer)
-            created_images.append(serializer.data)
+        serializer = self.get_serializer(data=request.data.get('images', []), many=True)
+        serializer.is_valid(raise_exception=True)
+        images = [Image(property=property, **image_data) for image_data in serializer.validated_data]
+
+        cover = request.data.get('cover')
+        if cover is None:
+            cover = next((index for index, image in enumerate(images) if image.is_cover), None)
+        elif isinstance(cover, bool) or not isinstance(cover, int) or not 0 <= cover < len(images):
+            return Response({"cover": ["Must be the index of one of the images."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        if cover is not None:
+            for index, image in enumerate(images):
+                image.is_cover = index == cover
+
+        with transaction.atomic():
+            if cover is not None:
+                Image.objects.filter(property=property, is_cover=True).update(is_cover=False)
+            Image.objects.bulk_create(images)
+            # bulk_create and update() skip the Image signals.
+            summary.refresh([property.id])
+            changes.record(PropertyChange.UPDATE, [property.id])
+        response_cache.bump('property', [property.id])
 
-        return Response(created_images, status=status.HTTP_201_CREATED)
+        return Response(self.get_serializer(images, many=True).data, status=status.HTTP_201_CREATED)
 
 class AmentiesViewSet(viewsets.ModelViewSet):
     queryset = Amenties.objects.all()
@@ -204,56 +381,57 @@ class LoanersViewSet(viewsets.ModelViewSet):
     serializer_class = LoanerSerializer
 
 
-class AuctionViewSet(viewsets.ModelViewSet):
+class AuctionViewSet(CachedResponseMixin, QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Auction.objects.all()
     serializer_class = AuctionSerializer
+    pagination_class = FeedPagination
+    query_budget = {'list': 4, 'retrieve': 3}
+    cache_resource = 'auction'
     
     def get_queryset(self):
         queryset = Auction.objects.all()
         
         general_search = self.request.query_params.get('search', None)
         if general_search:
-            queryset = queryset.filter(Q(name__icontains=general_search) | Q( description__icontains=general_search) | Q(location__name__icontains=general_search))
+            queryset = fulltext.search(queryset, general_search)
         return queryset
     
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def place_bid(self, request, pk=None):
-        auction = self.get_object()
-        bid_amount = request.data.get('bid_amount')
+        serializer = BidSerializer(data={'amount': request.data.get('bid_amount')})
+        serializer.is_valid(raise_exception=True)
 
-        if not bid_amount:
-            return Response(
-                {'error': 'Bid amount is required'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if auction.current_bid and bid_amount <= auction.current_bid:
-            return Response(
-                {'error': 'Bid must be higher than current bid'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if bid_amount < auction.starting_bid:
-            return Response(
-                {'error': 'Bid must be higher than starting bid'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        auction.current_bid = bid_amount
-        auction.save()
-        return Response(self.get_serializer(auction).data)
-
-class WishlistViewSet(viewsets.ModelViewSet):
+        try:
+            bid = bidding.place_bid(pk, request.user, serializer.validated_data['amount'])
+        except bidding.AuctionNotFound as exc:
+            return Response({'error': exc.detail}, status=status.HTTP_404_NOT_FOUND)
+        except bidding.BidRejected as exc:
+            return Response({'error': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(BidSerializer(bid).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def bids(self, request, pk=None):
+        queryset = Bid.objects.filter(auction_id=pk).order_by('-amount', 'created_at')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(BidSerializer(page, many=True).data)
+        return Response(BidSerializer(queryset, many=True).data)
+
+class WishlistViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = Wishlist.objects.all() 
     serializer_class = WishListSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
+    query_budget = {'list': 9, 'retrieve': 8}
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user)
+        return self.queryset.filter(user_id=self.request.user.pk)
 
     def create(self, request, *args, **kwargs):
         wishlist, created = Wishlist.objects.get_or_create(user=request.user)
-        return Response(WishListSerializer(wishlist).data, status=status.HTTP_200_OK)
+        wishlist = self.filter_queryset(self.get_queryset()).get(pk=wishlist.pk)
+        return Response(self.get_serializer(wishlist).data, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
     def add_items(self, request):
@@ -294,9 +472,9 @@ class WishlistViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST
                     )
 
-            wishlist.refresh_from_db()
+            wishlist = self.filter_queryset(self.get_queryset()).get(pk=wishlist.pk)
             return Response(
-                WishListSerializer(wishlist).data, 
+                self.get_serializer(wishlist).data, 
                 status=status.HTTP_200_OK
             )
 
@@ -307,15 +485,17 @@ class WishlistViewSet(viewsets.ModelViewSet):
             )
 
 
-class RequestTourViewset(viewsets.ModelViewSet):
+class RequestTourViewset(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = RequestedTour.objects.all() 
     serializer_class = RequestTourSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FeedPagination
+    query_budget = {'list': 5, 'retrieve': 4}
 
     def get_queryset(self):
         print(self.request.user.role)
         if(self.request.user.role != 'admin'):
-            return self.queryset.filter(user=self.request.user)
+            return self.queryset.filter(user_id=self.request.user.pk)
         else:
             return self.queryset.filter()
    
@@ -348,3 +528,42 @@ class RequestTourViewset(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+
+@require_GET
+async def auction_events(request, pk):
+    """
+    Live bids and status changes of one auction as Server-Sent Events, or as a long-poll
+    with ``?transport=poll``. Event ids are the auction's bid sequence numbers; clients
+    resume by sending ``Last-Event-ID`` (or ``?last_event_id=``) and get the bids they missed.
+    The event stream needs ``api.asgi``: under WSGI a streamed async response is read to
+    the end before anything is sent, so it is refused there with a 406. Long-polls work
+    under either.
+    """
+    poll = request.GET.get('transport') == 'poll'
+    if not poll and not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'Server-Sent Events are only served over ASGI; use ?transport=poll.'}, status=406
+        )
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid event id'}, status=400)
+
+    queue, state = await events.broker.subscribe(pk)
+    if queue is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    missed = await events.replay(pk, last_event_id, state)
+
+    if poll:
+        found = await events.wait_for_events(pk, queue, missed, resuming=last_event_id is not None)
+        return JsonResponse({
+            'events': found,
+            'last_event_id': found[-1]['id'] if found else last_event_id,
+        }, encoder=JSONEncoder)
+
+    response = StreamingHttpResponse(events.stream(pk, queue, missed), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response